@@ -14,9 +14,10 @@ from dotenv import load_dotenv
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from google.adk.runners import Runner
-from google.adk.sessions import DatabaseSessionService
+from session_store import get_service
 from manager.agent import root_agent
-from session_utils import call_agent_async, display_session_state, get_user_sessions_summary
+from manager.sub_agents.resource_recommendation_agent.agent import close_search_session
+from session_utils import call_agent_async, display_session_state, iter_user_sessions_summary
 from main import get_or_create_session, initialize_default_state, APP_NAME
 
 # Load environment variables
@@ -24,7 +25,7 @@ load_dotenv()
 
 # Database configuration (same as main.py)
 db_url = "sqlite:///./sahayak_agent_data.db"
-session_service = DatabaseSessionService(db_url=db_url)
+session_service = get_service(db_url)
 
 # Create the runner
 runner = Runner(
@@ -92,14 +93,18 @@ async def handle_command(command, user_id, session_id):
     
     elif cmd == "sessions":
         print("\n📂 Your Sessions:")
-        summary = get_user_sessions_summary(session_service, APP_NAME, user_id)
-        if summary.get("sessions"):
-            for i, session in enumerate(summary["sessions"], 1):
+        # Print each session as soon as it is loaded
+        i = 0
+        try:
+            for i, session in enumerate(iter_user_sessions_summary(session_service, APP_NAME, user_id), 1):
                 current = "👉 " if session["session_id"] == session_id else "   "
                 print(f"{current}{i}. {session['session_id'][:8]}... - {session['user_name']} ({session['user_role']})")
                 print(f"      Session #{session['session_count']}, {session['attendance_records_count']} attendance records")
+        except Exception as e:
+            print(f"❌ Error retrieving sessions: {e}")
         else:
-            print("   No sessions found.")
+            if not i:
+                print("   No sessions found.")
         return session_id
     
     elif cmd == "switch" and len(parts) > 1:
@@ -212,6 +217,9 @@ async def main_async():
         except Exception as e:
             print(f"\n❌ Error occurred: {e}")
             print("   Continuing with the session...")
+    
+    # Release pooled search connections before asyncio.run closes the loop
+    await close_search_session()
 
 
 def main():
@@ -2,7 +2,7 @@ import os
 import uvicorn
 from fastapi.middleware.cors import CORSMiddleware
 from google.adk.runners import Runner
-from google.adk.sessions import DatabaseSessionService
+from session_store import get_service
 from manager.agent import root_agent
 # from google.adk.services.exceptions import SessionNotFoundError
 from google.adk.cli.fast_api import get_fast_api_app
@@ -12,7 +12,7 @@ from google.adk.cli.fast_api import get_fast_api_app
 db_url = "sqlite:///./sahayak_agent_data.db"
 # Print the absolute path for debugging
 print(f"[DEBUG] Using database at: {os.path.abspath('./sahayak_agent_data.db')}")
-session_service = DatabaseSessionService(db_url=db_url)
+session_service = get_service(db_url)
 
 
 # Get the directory where main.py is located
@@ -194,15 +194,16 @@ async def get_user_sessions(user_id: str):
                     session_id=session_info.id
                 )
                 
+                state = full_session.state
                 session_details = {
                     "id": session_info.id,
                     "created_at": session_info.created_at,
-                    "user_name": full_session.state.get("user_name", ""),
-                    "user_role": full_session.state.get("user_role", ""),
-                    "session_count": full_session.state.get("session_count", 0),
-                    "attendance_records_count": len(full_session.state.get("attendance_records", {})),
-                    "interaction_count": len(full_session.state.get("interaction_history", [])),
-                    "preferences": full_session.state.get("preferences", {})
+                    "user_name": state.get("user_name", ""),
+                    "user_role": state.get("user_role", ""),
+                    "session_count": state.get("session_count", 0),
+                    "attendance_records_count": len(state.get("attendance_records") or ()),
+                    "interaction_count": len(state.get("interaction_history") or ()),
+                    "preferences": state.get("preferences", {})
                 }
                 detailed_sessions.append(session_details)
                 
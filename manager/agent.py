@@ -298,10 +298,12 @@ def clear_user_data(data_type: str, tool_context: ToolContext) -> dict:
         
         if data_type.lower() in ['attendance', 'all']:
             attendance_count = len(tool_context.state.get("attendance_records", {}))
+            attendance_version = tool_context.state.get("_attendance_version", 0) + 1
             if hasattr(tool_context.state, '__setitem__'):
                 tool_context.state["attendance_records"] = {}
+                tool_context.state["_attendance_version"] = attendance_version
             elif hasattr(tool_context.state, 'update'):
-                tool_context.state.update({"attendance_records": {}})
+                tool_context.state.update({"attendance_records": {}, "_attendance_version": attendance_version})
             cleared_items["attendance_records"] = attendance_count
         
         if data_type.lower() in ['preferences', 'all']:
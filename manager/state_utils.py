@@ -0,0 +1,29 @@
+import uuid
+
+import orjson
+
+
+# orjson options for the agents' state serializability probe. The session store
+# encodes state with json.dumps; with these options orjson likewise raises on
+# datetimes, dates and dataclass instances, and accepts int/float/bool/None
+# dict keys. The match is not exact: orjson still accepts UUID and Enum values
+# and date/UUID/Enum dict keys, and encodes NaN/Infinity as null, so state
+# holding those passes the probe. numpy floats fail the probe although
+# json.dumps accepts them, which only costs an unneeded clean.
+STATE_PROBE_OPTIONS = (
+    orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+)
+
+
+def cache_scope(tool_context):
+    """Return the id that scopes this session's entries in in-process caches.
+    
+    The id is created on first use and kept in state, so a session recreated
+    under an old session id starts with a fresh scope. Restored copies of a
+    session drop it (see session_utils.restore_session_data).
+    """
+    scope = tool_context.state.get("_cache_scope")
+    if scope is None:
+        scope = uuid.uuid4().hex
+        tool_context.state["_cache_scope"] = scope
+    return scope
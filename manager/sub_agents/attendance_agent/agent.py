@@ -163,7 +163,8 @@ def save_attendance(
         try:
             updates = {
                 "students_database": students_db,
-                "attendance_records": attendance_records
+                "attendance_records": attendance_records,
+                "_attendance_version": tool_context.state.get("_attendance_version", 0) + 1
             }
             
             for key, value in updates.items():
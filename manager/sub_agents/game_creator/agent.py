@@ -1,18 +1,20 @@
 from google.adk.agents import Agent
 
-def create_game_html(topic: str) -> dict:
-    """Generate a simple educational game as a single HTML file (placeholder logic)."""
-    html_content = f"""
+_GAME_HTML_TEMPLATE = """
     <!DOCTYPE html>
     <html>
-    <head><title>{topic} Game</title></head>
+    <head><title>%(topic)s Game</title></head>
     <body>
-    <h1>Game for {topic}</h1>
-    <p>This is a placeholder for a simple educational game about {topic}.</p>
+    <h1>Game for %(topic)s</h1>
+    <p>This is a placeholder for a simple educational game about %(topic)s.</p>
     <!-- Insert game code here -->
     </body>
     </html>
     """
+
+def create_game_html(topic: str) -> dict:
+    """Generate a simple educational game as a single HTML file (placeholder logic)."""
+    html_content = _GAME_HTML_TEMPLATE % {"topic": topic}
     return {"status": "success", "topic": topic, "html": html_content}
 
 game_creator = Agent(
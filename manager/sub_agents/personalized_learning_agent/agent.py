@@ -2,9 +2,13 @@ from google.adk.agents import Agent
 from google.adk.tools.tool_context import ToolContext
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional
-import json
+import logging
 import math
 
+import orjson
+
+logger = logging.getLogger(__name__)
+
 
 def safe_json_serializable(obj):
     """Ensure object is JSON serializable by converting problematic types."""
@@ -22,13 +26,48 @@ def safe_json_serializable(obj):
         return obj
 
 
+_JSON_PRIMITIVES = (str, int, float, bool, type(None))
+
+
+def _is_json_safe(obj):
+    """Check that obj only holds JSON-native types, without recursion or raising.
+    
+    Like json.dumps, a container repeated within its own contents (a cycle)
+    is unsafe, while one shared between separate branches is fine.
+    """
+    stack = [(obj, False)]
+    on_path = set()
+    while stack:
+        item, leaving = stack.pop()
+        if leaving:
+            on_path.discard(id(item))
+            continue
+        if isinstance(item, _JSON_PRIMITIVES):
+            continue
+        if isinstance(item, (dict, list, tuple)):
+            if id(item) in on_path:
+                return False
+            on_path.add(id(item))
+            # Popped after every child, taking item off the current path
+            stack.append((item, True))
+            if isinstance(item, dict):
+                for key in item:
+                    if not isinstance(key, _JSON_PRIMITIVES):
+                        return False
+                stack.extend((value, False) for value in item.values())
+            else:
+                stack.extend((value, False) for value in item)
+            continue
+        return False
+    return True
+
+
 def clean_state_data(tool_context: ToolContext):
     """Clean state data to ensure JSON serializability."""
-    try:
-        json.dumps(tool_context.state)
-    except (TypeError, ValueError) as e:
-        print(f"Warning: State contains non-JSON serializable data: {e}")
-        tool_context.state = safe_json_serializable(tool_context.state)
+    if _is_json_safe(tool_context.state):
+        return
+    print("Warning: State contains non-JSON serializable data")
+    tool_context.state = safe_json_serializable(tool_context.state)
 
 
 def create_personalized_learning_path(
@@ -51,7 +90,7 @@ def create_personalized_learning_path(
         Comprehensive personalized learning path
     """
     try:
-        print(f"--- Tool: create_personalized_learning_path called for {student_name} in {subject} ---")
+        logger.debug("Tool: create_personalized_learning_path called for %s in %s", student_name, subject)
         
         clean_state_data(tool_context)
         
@@ -81,7 +120,9 @@ def create_personalized_learning_path(
         difficult_subject = analysis.get("academic_analysis", {}).get("challenging_subject", "")
         
         # Create learning path ID
-        path_id = f"path_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{student_name.replace(' ', '_')}_{subject.replace(' ', '_')}"
+        now = datetime.now()
+        student_slug = student_name.replace(' ', '_')
+        path_id = f"path_{now.strftime('%Y%m%d_%H%M%S')}_{student_slug}_{subject.replace(' ', '_')}"
         
         # Calculate topic distribution based on student needs
         total_topics = len(curriculum_topics)
@@ -100,7 +141,7 @@ def create_personalized_learning_path(
             "path_id": path_id,
             "student_name": student_name,
             "subject": subject,
-            "created_date": datetime.now().isoformat(),
+            "created_date": now.isoformat(),
             "duration_weeks": duration_weeks,
             "learning_style": learning_style,
             "difficulty_level": "adaptive",
@@ -207,25 +248,32 @@ def create_personalized_learning_path(
         learning_paths = tool_context.state.get("learning_paths", {})
         learning_paths[path_id] = learning_path
         tool_context.state["learning_paths"] = learning_paths
+        tool_context.state["_learning_paths_version"] = tool_context.state.get("_learning_paths_version", 0) + 1
         
         clean_state_data(tool_context)
         
         # Generate teacher insights
         teacher_insights = generate_teacher_insights(learning_path, analysis)
         
-        return {
-            "action": "create_personalized_learning_path",
-            "status": "success",
+        # Encode the (potentially large) path once in C instead of letting the
+        # framework re-walk the nested dict with the stdlib encoder.
+        payload_json = orjson.dumps({
             "path_id": path_id,
             "learning_path": learning_path,
             "teacher_insights": teacher_insights,
-            "message": f"✅ Created personalized {duration_weeks}-week learning path for {student_name} in {subject}",
             "summary": {
                 "total_weeks": len(learning_path["weekly_plan"]),
                 "total_topics": len(curriculum_topics),
                 "learning_style": learning_style,
                 "key_adaptations": len(adaptations)
             }
+        }, default=str).decode()
+        
+        return {
+            "action": "create_personalized_learning_path",
+            "status": "success",
+            "payload_json": payload_json,
+            "message": f"✅ Created personalized {duration_weeks}-week learning path for {student_name} in {subject}"
         }
         
     except Exception as e:
@@ -237,40 +285,41 @@ def create_personalized_learning_path(
         }
 
 
+_BASE_ACTIVITIES = {
+    "visual": [
+        "Create visual mind map of {topic} concepts",
+        "Watch educational video about {topic}",
+        "Design infographic explaining {topic}",
+        "Use diagram to understand {topic} relationships"
+    ],
+    "auditory": [
+        "Listen to podcast about {topic}",
+        "Participate in discussion about {topic}",
+        "Record audio explanation of {topic}",
+        "Attend virtual lecture on {topic}"
+    ],
+    "kinesthetic": [
+        "Conduct hands-on experiment related to {topic}",
+        "Build physical model of {topic} concepts",
+        "Role-play scenarios involving {topic}",
+        "Create interactive demonstration of {topic}"
+    ],
+    "reading/writing": [
+        "Read comprehensive article about {topic}",
+        "Write detailed essay on {topic}",
+        "Create written summary of {topic}",
+        "Research and compile notes on {topic}"
+    ]
+}
+
+# Only the first two activities per style are used; slice them once.
+_STYLE_ACTIVITIES = {style: tuple(acts[:2]) for style, acts in _BASE_ACTIVITIES.items()}
+
+
 def generate_learning_activities(topic, learning_style, social_preference, subject, difficulty_level):
     """Generate learning activities based on student profile."""
-    activities = []
-    
-    base_activities = {
-        "visual": [
-            f"Create visual mind map of {topic} concepts",
-            f"Watch educational video about {topic}",
-            f"Design infographic explaining {topic}",
-            f"Use diagram to understand {topic} relationships"
-        ],
-        "auditory": [
-            f"Listen to podcast about {topic}",
-            f"Participate in discussion about {topic}",
-            f"Record audio explanation of {topic}",
-            f"Attend virtual lecture on {topic}"
-        ],
-        "kinesthetic": [
-            f"Conduct hands-on experiment related to {topic}",
-            f"Build physical model of {topic} concepts",
-            f"Role-play scenarios involving {topic}",
-            f"Create interactive demonstration of {topic}"
-        ],
-        "reading/writing": [
-            f"Read comprehensive article about {topic}",
-            f"Write detailed essay on {topic}",
-            f"Create written summary of {topic}",
-            f"Research and compile notes on {topic}"
-        ]
-    }
-    
-    # Get base activities for learning style
-    style_activities = base_activities.get(learning_style, base_activities["visual"])
-    activities.extend(style_activities[:2])  # Take first 2
+    style_activities = _STYLE_ACTIVITIES.get(learning_style, _STYLE_ACTIVITIES["visual"])
+    activities = [template.format(topic=topic) for template in style_activities]
     
     # Add social learning component
     if social_preference == "collaborative":
@@ -347,16 +396,16 @@ def generate_resources_needed(topic, learning_style, subject):
     return list(set(resources))  # Remove duplicates
 
 
+_ASSESSMENT_METHODS = {
+    "visual": "Visual project or presentation",
+    "auditory": "Oral presentation or discussion",
+    "kinesthetic": "Hands-on demonstration or experiment",
+}
+
+
 def determine_assessment_method(learning_style, social_preference):
     """Determine appropriate assessment method."""
-    if learning_style == "visual":
-        return "Visual project or presentation"
-    elif learning_style == "auditory":
-        return "Oral presentation or discussion"
-    elif learning_style == "kinesthetic":
-        return "Hands-on demonstration or experiment"
-    else:
-        return "Written assignment or test"
+    return _ASSESSMENT_METHODS.get(learning_style, "Written assignment or test")
 
 
 def generate_differentiation_strategies(analysis, topic, subject):
@@ -379,23 +428,25 @@ def generate_differentiation_strategies(analysis, topic, subject):
     return strategies
 
 
+_EMOTIONAL_SUPPORT_STRATEGIES = {
+    "needs_support": (
+        "Regular check-ins on emotional state",
+        "Stress management techniques",
+        "Positive reinforcement strategies",
+        "Break time when needed"
+    ),
+    "low_confidence": (
+        "Build confidence through small successes",
+        "Encourage effort over results",
+        "Provide specific positive feedback"
+    ),
+}
+_DEFAULT_EMOTIONAL_SUPPORT = ("Monitor for any signs of stress or difficulty",)
+
+
 def generate_emotional_support_strategies(emotional_stability):
     """Generate emotional support strategies."""
-    if emotional_stability == "needs_support":
-        return [
-            "Regular check-ins on emotional state",
-            "Stress management techniques",
-            "Positive reinforcement strategies",
-            "Break time when needed"
-        ]
-    elif emotional_stability == "low_confidence":
-        return [
-            "Build confidence through small successes",
-            "Encourage effort over results",
-            "Provide specific positive feedback"
-        ]
-    else:
-        return ["Monitor for any signs of stress or difficulty"]
+    return list(_EMOTIONAL_SUPPORT_STRATEGIES.get(emotional_stability, _DEFAULT_EMOTIONAL_SUPPORT))
 
 
 def generate_success_criteria(topic, subject):
@@ -408,18 +459,16 @@ def generate_success_criteria(topic, subject):
     ]
 
 
+_FINAL_ASSESSMENT_FORMATS = {
+    "visual": "Portfolio with visual elements",
+    "auditory": "Oral examination",
+    "kinesthetic": "Practical demonstration",
+}
+
+
 def determine_final_assessment_format(learning_style, social_preference):
     """Determine final assessment format."""
-    formats = []
-    
-    if learning_style == "visual":
-        formats.append("Portfolio with visual elements")
-    elif learning_style == "auditory":
-        formats.append("Oral examination")
-    elif learning_style == "kinesthetic":
-        formats.append("Practical demonstration")
-    else:
-        formats.append("Comprehensive written exam")
+    formats = [_FINAL_ASSESSMENT_FORMATS.get(learning_style, "Comprehensive written exam")]
     
     if social_preference == "collaborative":
         formats.append("Group project component")
@@ -480,7 +529,7 @@ def get_learning_path(
         Learning path(s) information
     """
     try:
-        print(f"--- Tool: get_learning_path called ---")
+        logger.debug("Tool: get_learning_path called")
         
         clean_state_data(tool_context)
         
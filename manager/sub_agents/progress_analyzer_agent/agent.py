@@ -2,11 +2,28 @@ from google.adk.agents import Agent
 from google.adk.tools.tool_context import ToolContext
 from datetime import datetime, date, timedelta
 from typing import List, Dict, Optional
-import json
+from collections import Counter
+from bisect import bisect_left, bisect_right
+from operator import itemgetter
+from functools import lru_cache
+
+import numpy as np
+import orjson
+from cachetools import LRUCache
+
+from ...state_utils import STATE_PROBE_OPTIONS, cache_scope
+
+
+_LEAF_TYPES = frozenset((int, float, str, bool, type(None)))
 
 
 def safe_json_serializable(obj):
     """Ensure object is JSON serializable by converting problematic types."""
+    # Already-clean leaves and flat dicts (most records) are returned as-is
+    if type(obj) in _LEAF_TYPES:
+        return obj
+    if type(obj) is dict and all(type(v) in _LEAF_TYPES for v in obj.values()):
+        return obj
     if isinstance(obj, bytes):
         return obj.decode('utf-8', errors='ignore')
     elif isinstance(obj, datetime):
@@ -21,13 +38,159 @@ def safe_json_serializable(obj):
         return obj
 
 
+def _mark_written(tool_context: ToolContext):
+    """Bump this agent's write version so the next clean_state_data re-checks."""
+    tool_context.state["_progress_state_version"] = tool_context.state.get("_progress_state_version", 0) + 1
+
+
 def clean_state_data(tool_context: ToolContext):
-    """Clean state data to ensure JSON serializability."""
+    """Clean state data to ensure JSON serializability.
+    
+    Skipped when none of this agent's writes (see _mark_written) happened since
+    the last check; the other agents check state after their own writes.
+    """
+    version = tool_context.state.get("_progress_state_version", 0)
+    if tool_context.state.get("_progress_clean_version") == version:
+        return
     try:
-        json.dumps(tool_context.state)
-    except (TypeError, ValueError) as e:
+        orjson.dumps(tool_context.state, option=STATE_PROBE_OPTIONS)
+    except orjson.JSONEncodeError as e:
         print(f"Warning: State contains non-JSON serializable data: {e}")
         tool_context.state = safe_json_serializable(tool_context.state)
+    tool_context.state["_progress_clean_version"] = version
+
+
+# Records without a date sort after every real date. MCQ and game lookups
+# (_date_range_indices) count them as "today"; attendance lookups exclude them.
+_UNDATED_ORDINAL = date.max.toordinal() + 1
+
+# (field, default) pairs kept as parallel arrays for each record source
+_ATTENDANCE_FIELDS = (("status", None),)
+_MCQ_FIELDS = (("score", 0), ("subject", "Unknown"))
+_GAME_FIELDS = (("duration_minutes", 0), ("game_type", "Unknown"))
+
+
+def _record_ordinal(record):
+    """Parse a record's ISO date once into a sortable day ordinal."""
+    value = record.get("date")
+    if not value:
+        return _UNDATED_ORDINAL
+    return datetime.fromisoformat(value).date().toordinal()
+
+
+def _build_columns(records, fields):
+    """Turn records into date-sorted parallel arrays: {"dates": [...], field: [...]}.
+    
+    Args:
+        records: Iterable of record dicts
+        fields: Sequence of (field_name, default) pairs to extract
+    """
+    rows = sorted(((_record_ordinal(record), record) for record in records), key=itemgetter(0))
+    columns = {"dates": [ordinal for ordinal, _ in rows]}
+    for field, default in fields:
+        columns[field] = [record.get(field, default) for _, record in rows]
+    return columns
+
+
+def _date_range_indices(dates, start_date, end_date, today=None):
+    """Indices of a sorted ordinal column falling within [start_date, end_date].
+    
+    Undated entries are included when today is inside the range.
+    """
+    lo = bisect_left(dates, start_date.toordinal())
+    hi = bisect_right(dates, end_date.toordinal())
+    indices = range(lo, hi)
+    today = today or date.today()
+    if start_date <= today <= end_date:
+        undated = bisect_left(dates, _UNDATED_ORDINAL)
+        if undated < len(dates):
+            return list(indices) + list(range(undated, len(dates)))
+    return indices
+
+
+def _name_key(name):
+    """Canonical lookup key for a student name."""
+    return name.casefold()
+
+
+@lru_cache(maxsize=1024)
+def _name_slug(name):
+    """Underscore-joined form of a student name used in analysis ids."""
+    return name.replace(' ', '_')
+
+
+# Per-session indexes over state record sources and progress history summaries,
+# keyed by cache_scope. They are derived data, so they live in this process only
+# and are never written back to session state.
+_INDEX_CACHE = LRUCache(maxsize=256)
+_HISTORY_CACHE = LRUCache(maxsize=256)
+
+# Sources whose writers bump a version counter on every change. Only these are
+# cached; other sources (mcq_results, game_activities) have no writer in this
+# app to bump a counter, so their indexes are rebuilt on every lookup.
+_SOURCE_VERSION_KEYS = {
+    "attendance_records": "_attendance_version",
+    "learning_paths": "_learning_paths_version",
+    "progress_analyses": "_progress_analyses_version",
+}
+
+
+def _get_index(tool_context: ToolContext, source_key, group_key, fields=None):
+    """Return a grouping of state[source_key], cached per session and source version.
+    
+    Records are grouped by group_key(record). With fields, each group is stored as
+    date-sorted columns (see _build_columns); otherwise as a list of record ids.
+    """
+    records = tool_context.state.get(source_key, {})
+    version_key = _SOURCE_VERSION_KEYS.get(source_key)
+    if version_key:
+        version = tool_context.state.get(version_key, 0)
+        cache_key = (cache_scope(tool_context), source_key)
+        cached = _INDEX_CACHE.get(cache_key)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+    
+    grouped = {}
+    for record_id, record in records.items():
+        grouped.setdefault(group_key(record), []).append(record if fields else record_id)
+    if fields:
+        grouped = {key: _build_columns(group, fields) for key, group in grouped.items()}
+    
+    if version_key:
+        _INDEX_CACHE[cache_key] = (version, grouped)
+    return grouped
+
+
+def _get_attendance_index(tool_context: ToolContext):
+    """student_id -> date-sorted attendance columns."""
+    return _get_index(
+        tool_context, "attendance_records", lambda record: record.get("student_id"), _ATTENDANCE_FIELDS
+    )
+
+
+def _get_name_index(tool_context: ToolContext, source_key, fields=None):
+    """Casefolded student name -> records of state[source_key]."""
+    return _get_index(
+        tool_context, source_key, lambda record: _name_key(record.get("student_name", "")), fields
+    )
+
+
+def _store_progress_analysis(tool_context: ToolContext, analysis_id, progress_analysis):
+    """Save an analysis and append it to the per-student index without a rebuild.
+    
+    Analyses are stored chronologically, so each student's id list stays date-ordered.
+    """
+    by_name = _get_name_index(tool_context, "progress_analyses")
+    progress_analyses = tool_context.state.get("progress_analyses", {})
+    if analysis_id not in progress_analyses:
+        by_name.setdefault(_name_key(progress_analysis["student_name"]), []).append(analysis_id)
+    progress_analyses[analysis_id] = progress_analysis
+    
+    version = tool_context.state.get("_progress_analyses_version", 0) + 1
+    tool_context.state["progress_analyses"] = progress_analyses
+    tool_context.state["_progress_analyses_version"] = version
+    _INDEX_CACHE[(cache_scope(tool_context), "progress_analyses")] = (version, by_name)
+    _mark_written(tool_context)
 
 
 def analyze_student_progress(
@@ -52,11 +215,10 @@ def analyze_student_progress(
         
         # Get all relevant data from state
         students_db = tool_context.state.get("students_database", {})
-        attendance_records = tool_context.state.get("attendance_records", {})
         student_profiles = tool_context.state.get("student_profiles", {})
         learning_paths = tool_context.state.get("learning_paths", {})
-        mcq_results = tool_context.state.get("mcq_results", {})  # Assuming MCQ results are stored
-        game_activities = tool_context.state.get("game_activities", {})  # Assuming game activities are stored
+        mcq_index = _get_name_index(tool_context, "mcq_results", _MCQ_FIELDS)  # Assuming MCQ results are stored
+        game_index = _get_name_index(tool_context, "game_activities", _GAME_FIELDS)  # Assuming game activities are stored
         
         # Find student data
         student_id = None
@@ -75,8 +237,10 @@ def analyze_student_progress(
                 "message": f"Student '{student_name}' not found in database"
             }
         
-        # Calculate date range
-        end_date = date.today()
+        # Calculate date range (read the clock once for the whole analysis)
+        now = datetime.now()
+        today = now.date()
+        end_date = today
         start_date = end_date - timedelta(days=time_period_days)
         
         # Initialize progress analysis
@@ -84,7 +248,7 @@ def analyze_student_progress(
             "student_name": student_name,
             "student_id": student_id,
             "analysis_period": f"{start_date} to {end_date}",
-            "analysis_date": datetime.now().isoformat(),
+            "analysis_date": now.isoformat(),
             "time_period_days": time_period_days,
             "attendance_analysis": {},
             "academic_performance": {},
@@ -98,25 +262,25 @@ def analyze_student_progress(
         
         # 1. ATTENDANCE ANALYSIS
         attendance_data = analyze_attendance_pattern(
-            student_id, attendance_records, start_date, end_date
+            student_id, _get_attendance_index(tool_context), start_date, end_date
         )
         progress_analysis["attendance_analysis"] = attendance_data
         
         # 2. MCQ PERFORMANCE ANALYSIS
         mcq_data = analyze_mcq_performance(
-            student_name, mcq_results, start_date, end_date
+            student_name, mcq_index, start_date, end_date, today=today
         )
         progress_analysis["academic_performance"]["mcq_performance"] = mcq_data
         
         # 3. EDUCATIONAL GAMES ANALYSIS
         games_data = analyze_game_engagement(
-            student_name, game_activities, start_date, end_date
+            student_name, game_index, start_date, end_date, today=today
         )
         progress_analysis["engagement_metrics"]["games"] = games_data
         
         # 4. LEARNING PATH PROGRESS
         learning_progress = analyze_learning_path_progress(
-            student_name, learning_paths
+            student_name, learning_paths, _get_name_index(tool_context, "learning_paths")
         )
         progress_analysis["learning_path_progress"] = learning_progress
         
@@ -143,10 +307,8 @@ def analyze_student_progress(
         progress_analysis["summary"] = summary
         
         # Store analysis for future reference
-        progress_analyses = tool_context.state.get("progress_analyses", {})
-        analysis_id = f"progress_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{student_name.replace(' ', '_')}"
-        progress_analyses[analysis_id] = progress_analysis
-        tool_context.state["progress_analyses"] = progress_analyses
+        analysis_id = f"progress_{now:%Y%m%d_%H%M%S}_{_name_slug(student_name)}"
+        _store_progress_analysis(tool_context, analysis_id, progress_analysis)
         
         clean_state_data(tool_context)
         
@@ -173,33 +335,135 @@ def analyze_student_progress(
         }
 
 
-def analyze_attendance_pattern(student_id, attendance_records, start_date, end_date):
-    """Analyze attendance patterns for the student."""
-    student_attendance = []
+def analyze_class_progress(
+    class_id: str,
+    time_period_days: int = 30,
+    tool_context: ToolContext = None
+) -> dict:
+    """Progress overview for every student in a class (grade) in one sweep.
     
-    for record_key, record in attendance_records.items():
-        if record.get("student_id") == student_id:
-            record_date = datetime.fromisoformat(record.get("date")).date()
-            if start_date <= record_date <= end_date:
-                student_attendance.append(record)
+    Args:
+        class_id: Grade/class of the students to analyze
+        time_period_days: Number of days to analyze (default 30)
+        tool_context: Context for accessing session state
     
-    total_days = len(student_attendance)
-    present_days = sum(1 for r in student_attendance if r.get("status") == "present")
-    absent_days = sum(1 for r in student_attendance if r.get("status") == "absent")
-    late_days = sum(1 for r in student_attendance if r.get("status") == "late")
+    Returns:
+        Per-student key metrics and class-level summary
+    """
+    try:
+        print(f"--- Tool: analyze_class_progress called for {class_id} ---")
+        
+        clean_state_data(tool_context)
+        
+        students_db = tool_context.state.get("students_database", {})
+        class_key = _name_key(str(class_id))
+        class_students = [
+            (sid, info) for sid, info in students_db.items()
+            if _name_key(str(info.get("grade", ""))) == class_key
+        ]
+        
+        if not class_students:
+            return {
+                "action": "analyze_class_progress",
+                "status": "not_found",
+                "message": f"No students found in class '{class_id}'"
+            }
+        
+        now = datetime.now()
+        today = now.date()
+        end_date = today
+        start_date = end_date - timedelta(days=time_period_days)
+        
+        # Each source is bucketed per student once; every student is then a dict hit
+        attendance_index = _get_attendance_index(tool_context)
+        mcq_index = _get_name_index(tool_context, "mcq_results", _MCQ_FIELDS)
+        game_index = _get_name_index(tool_context, "game_activities", _GAME_FIELDS)
+        
+        student_reports = []
+        for student_id, info in class_students:
+            name = info.get("name", "")
+            attendance_data = analyze_attendance_pattern(student_id, attendance_index, start_date, end_date)
+            mcq_data = analyze_mcq_performance(name, mcq_index, start_date, end_date, today=today)
+            games_data = analyze_game_engagement(name, game_index, start_date, end_date, today=today)
+            student_reports.append({
+                "student_id": student_id,
+                "student_name": name,
+                "overall_score": calculate_overall_progress_score(attendance_data, mcq_data, games_data, None),
+                "attendance_rate": attendance_data["attendance_percentage"],
+                "mcq_average": mcq_data["average_score"],
+                "improvement_trend": mcq_data["improvement_trend"],
+                "engagement_level": games_data["engagement_level"]
+            })
+        
+        student_reports.sort(key=itemgetter("overall_score"))
+        class_average = round(sum(r["overall_score"] for r in student_reports) / len(student_reports), 2)
+        needs_support = [r["student_name"] for r in student_reports if r["overall_score"] < _PERFORMANCE_THRESHOLDS[0]]
+        
+        return {
+            "action": "analyze_class_progress",
+            "status": "success",
+            "class_id": class_id,
+            "analysis_period": f"{start_date} to {end_date}",
+            "analysis_date": now.isoformat(),
+            "student_count": len(student_reports),
+            "class_average_score": class_average,
+            "students_needing_support": needs_support,
+            "students": student_reports,
+            "message": f"✅ Progress overview completed for {len(student_reports)} students in class {class_id}"
+        }
+        
+    except Exception as e:
+        print(f"Error in analyze_class_progress: {e}")
+        return {
+            "action": "analyze_class_progress",
+            "status": "error",
+            "message": f"Failed to analyze class progress: {str(e)}"
+        }
+
+
+# Ascending ">=" thresholds; bisect_right(thresholds, value) indexes the matching label.
+_ATTENDANCE_THRESHOLDS = (75, 85, 95)
+_ATTENDANCE_LABELS = (
+    "Poor attendance - requires intervention",
+    "Moderate attendance - needs improvement",
+    "Good attendance",
+    "Excellent attendance"
+)
+_MCQ_THRESHOLDS = (65, 75, 85)
+_MCQ_LABELS = (
+    "Below average - needs additional support",
+    "Average performance - room for improvement",
+    "Good academic performance",
+    "Excellent academic performance"
+)
+_PERFORMANCE_THRESHOLDS = (65, 75, 85)
+_PERFORMANCE_LEVELS = ("needs improvement", "satisfactory", "good", "excellent")
+
+
+def analyze_attendance_pattern(student_id, attendance_index, start_date, end_date):
+    """Analyze attendance patterns for the student.
+    
+    Attendance is always saved with a date; records missing one sort past
+    end_date and are not counted.
+    """
+    columns = attendance_index.get(student_id)
+    if columns:
+        lo = bisect_left(columns["dates"], start_date.toordinal())
+        hi = bisect_right(columns["dates"], end_date.toordinal())
+        statuses = columns["status"][lo:hi]
+    else:
+        statuses = []
+    
+    counts = Counter(statuses)
+    total_days = len(statuses)
+    present_days = counts["present"]
+    absent_days = counts["absent"]
+    late_days = counts["late"]
     
     attendance_percentage = (present_days / total_days * 100) if total_days > 0 else 0
     
     # Analyze patterns
-    patterns = []
-    if attendance_percentage >= 95:
-        patterns.append("Excellent attendance")
-    elif attendance_percentage >= 85:
-        patterns.append("Good attendance")
-    elif attendance_percentage >= 75:
-        patterns.append("Moderate attendance - needs improvement")
-    else:
-        patterns.append("Poor attendance - requires intervention")
+    patterns = [_ATTENDANCE_LABELS[bisect_right(_ATTENDANCE_THRESHOLDS, attendance_percentage)]]
     
     if late_days > total_days * 0.1:  # More than 10% late
         patterns.append("Frequent tardiness")
@@ -215,15 +479,35 @@ def analyze_attendance_pattern(student_id, attendance_records, start_date, end_d
     }
 
 
-def analyze_mcq_performance(student_name, mcq_results, start_date, end_date):
-    """Analyze MCQ test performance."""
-    student_mcqs = []
+def _mcq_kernel(scores, subject_ids, n_subjects):
+    """Vectorized MCQ aggregates over one student's date-ordered scores.
     
-    for result_key, result in mcq_results.items():
-        if result.get("student_name", "").lower() == student_name.lower():
-            result_date = datetime.fromisoformat(result.get("date", datetime.now().isoformat())).date()
-            if start_date <= result_date <= end_date:
-                student_mcqs.append(result)
+    Returns plain Python numbers/lists so results stay JSON-serializable:
+    (total, highest, lowest, early_avg, recent_avg, subject_sums, subject_counts, subject_best)
+    """
+    subject_sums = np.zeros(n_subjects, dtype=scores.dtype)
+    np.add.at(subject_sums, subject_ids, scores)
+    subject_counts = np.bincount(subject_ids, minlength=n_subjects)
+    subject_best = np.full(n_subjects, scores.min(), dtype=scores.dtype)
+    np.maximum.at(subject_best, subject_ids, scores)
+    return (
+        scores.sum().item(),
+        scores.max().item(),
+        scores.min().item(),
+        scores[:3].sum().item() / 3,
+        scores[-3:].sum().item() / 3,
+        subject_sums.tolist(),
+        subject_counts.tolist(),
+        subject_best.tolist(),
+    )
+
+
+def analyze_mcq_performance(student_name, mcq_index, start_date, end_date, today=None):
+    """Analyze MCQ test performance."""
+    mcq_columns = mcq_index.get(_name_key(student_name))
+    student_mcqs = (
+        _date_range_indices(mcq_columns["dates"], start_date, end_date, today) if mcq_columns else ()
+    )
     
     if not student_mcqs:
         return {
@@ -236,32 +520,31 @@ def analyze_mcq_performance(student_name, mcq_results, start_date, end_date):
             "patterns": ["No MCQ tests taken in this period"]
         }
     
-    scores = [r.get("score", 0) for r in student_mcqs]
     total_tests = len(student_mcqs)
-    average_score = sum(scores) / total_tests
-    highest_score = max(scores)
-    lowest_score = min(scores)
-    
-    # Analyze by subject
-    subject_performance = {}
-    for mcq in student_mcqs:
-        subject = mcq.get("subject", "Unknown")
-        if subject not in subject_performance:
-            subject_performance[subject] = []
-        subject_performance[subject].append(mcq.get("score", 0))
-    
-    # Calculate subject averages
-    for subject, scores_list in subject_performance.items():
-        subject_performance[subject] = {
-            "average": sum(scores_list) / len(scores_list),
-            "tests_taken": len(scores_list),
-            "best_score": max(scores_list)
+    score_column = mcq_columns["score"]
+    subject_column = mcq_columns["subject"]
+    subject_to_id = {}  # first-seen order, matching the per-subject report order
+    scores = np.asarray([score_column[i] for i in student_mcqs])
+    subject_ids = np.fromiter(
+        (subject_to_id.setdefault(subject_column[i], len(subject_to_id)) for i in student_mcqs),
+        dtype=np.intp, count=total_tests
+    )
+    
+    (total_score, highest_score, lowest_score, early_avg, recent_avg,
+     subject_sums, subject_counts, subject_best) = _mcq_kernel(scores, subject_ids, len(subject_to_id))
+    
+    average_score = total_score / total_tests
+    subject_performance = {
+        subject: {
+            "average": subject_sums[sid] / subject_counts[sid],
+            "tests_taken": subject_counts[sid],
+            "best_score": subject_best[sid]
         }
+        for subject, sid in subject_to_id.items()
+    }
     
     # Determine improvement trend
-    if len(scores) >= 3:
-        recent_avg = sum(scores[-3:]) / 3
-        early_avg = sum(scores[:3]) / 3
+    if total_tests >= 3:
         if recent_avg > early_avg + 5:
             trend = "improving"
         elif recent_avg < early_avg - 5:
@@ -272,15 +555,7 @@ def analyze_mcq_performance(student_name, mcq_results, start_date, end_date):
         trend = "insufficient_data"
     
     # Generate patterns
-    patterns = []
-    if average_score >= 85:
-        patterns.append("Excellent academic performance")
-    elif average_score >= 75:
-        patterns.append("Good academic performance")
-    elif average_score >= 65:
-        patterns.append("Average performance - room for improvement")
-    else:
-        patterns.append("Below average - needs additional support")
+    patterns = [_MCQ_LABELS[bisect_right(_MCQ_THRESHOLDS, average_score)]]
     
     return {
         "total_tests": total_tests,
@@ -293,15 +568,12 @@ def analyze_mcq_performance(student_name, mcq_results, start_date, end_date):
     }
 
 
-def analyze_game_engagement(student_name, game_activities, start_date, end_date):
+def analyze_game_engagement(student_name, game_index, start_date, end_date, today=None):
     """Analyze educational game engagement."""
-    student_games = []
-    
-    for activity_key, activity in game_activities.items():
-        if activity.get("student_name", "").lower() == student_name.lower():
-            activity_date = datetime.fromisoformat(activity.get("date", datetime.now().isoformat())).date()
-            if start_date <= activity_date <= end_date:
-                student_games.append(activity)
+    game_columns = game_index.get(_name_key(student_name))
+    student_games = (
+        _date_range_indices(game_columns["dates"], start_date, end_date, today) if game_columns else ()
+    )
     
     if not student_games:
         return {
@@ -313,17 +585,14 @@ def analyze_game_engagement(student_name, game_activities, start_date, end_date)
             "patterns": ["No educational games played in this period"]
         }
     
+    durations = game_columns["duration_minutes"]
+    types = game_columns["game_type"]
     total_games = len(student_games)
-    total_time = sum(g.get("duration_minutes", 0) for g in student_games)
+    total_time = sum(durations[i] for i in student_games)
     average_session = total_time / total_games if total_games > 0 else 0
     
     # Analyze game types
-    game_types = {}
-    for game in student_games:
-        game_type = game.get("game_type", "Unknown")
-        if game_type not in game_types:
-            game_types[game_type] = 0
-        game_types[game_type] += 1
+    game_types = dict(Counter(types[i] for i in student_games))
     
     # Determine engagement level
     games_per_week = total_games / 4  # Assuming 4 weeks in period
@@ -357,13 +626,9 @@ def analyze_game_engagement(student_name, game_activities, start_date, end_date)
     }
 
 
-def analyze_learning_path_progress(student_name, learning_paths):
+def analyze_learning_path_progress(student_name, learning_paths, path_index):
     """Analyze progress on assigned learning paths."""
-    student_paths = []
-    
-    for path_id, path_data in learning_paths.items():
-        if path_data.get("student_name", "").lower() == student_name.lower():
-            student_paths.append(path_data)
+    student_paths = [learning_paths[path_id] for path_id in path_index.get(_name_key(student_name), ())]
     
     if not student_paths:
         return {
@@ -374,11 +639,18 @@ def analyze_learning_path_progress(student_name, learning_paths):
         }
     
     active_paths = len(student_paths)
-    subjects = list(set(path.get("subject", "") for path in student_paths))
     
+    # One pass collects subjects (deduplicated, in path order) and planned weeks.
     # Calculate overall completion (simplified - would need actual progress tracking)
     # For now, assume some basic completion metrics
-    total_weeks_planned = sum(path.get("duration_weeks", 0) for path in student_paths)
+    subjects = {}
+    total_weeks_planned = 0
+    for path in student_paths:
+        subject = path.get("subject")
+        if subject:
+            subjects[subject] = None
+        total_weeks_planned += path.get("duration_weeks", 0)
+    subjects = list(subjects)
     
     patterns = []
     if active_paths > 0:
@@ -393,6 +665,25 @@ def analyze_learning_path_progress(student_name, learning_paths):
     }
 
 
+_CONSISTENCY_THRESHOLDS = (75, 90)
+_CONSISTENCY_LABELS = ("inconsistent", "moderately_consistent", "highly_consistent")
+
+# (high game engagement, improving MCQ trend) -> engagement preference
+_ENGAGEMENT_PREFERENCE = {
+    (True, True): "multi_modal_learner",
+    (True, False): "interactive_learner",
+    (False, True): "traditional_assessments",
+}
+
+# (MCQ trend, attendance bucket) -> learning momentum; buckets use strict ">" thresholds
+_MOMENTUM_ATTENDANCE_THRESHOLDS = (75, 85)
+_LEARNING_MOMENTUM = {
+    ("improving", 2): "accelerating",
+    ("stable", 1): "steady",
+    ("stable", 2): "steady",
+}
+
+
 def analyze_behavioral_patterns(student_name, student_profiles, attendance_data, mcq_data, games_data):
     """Analyze behavioral patterns from all data sources."""
     profile = student_profiles.get(student_name, {})
@@ -408,54 +699,42 @@ def analyze_behavioral_patterns(student_name, student_profiles, attendance_data,
     
     # Analyze consistency
     attendance_rate = attendance_data.get("attendance_percentage", 0)
-    if attendance_rate >= 90:
-        behavioral_insights["consistency"] = "highly_consistent"
-    elif attendance_rate >= 75:
-        behavioral_insights["consistency"] = "moderately_consistent"
-    else:
-        behavioral_insights["consistency"] = "inconsistent"
+    behavioral_insights["consistency"] = _CONSISTENCY_LABELS[bisect_right(_CONSISTENCY_THRESHOLDS, attendance_rate)]
     
     # Analyze engagement preference
     games_engagement = games_data.get("engagement_level", "no_data")
     mcq_performance = mcq_data.get("improvement_trend", "no_data")
+    behavioral_insights["engagement_preference"] = _ENGAGEMENT_PREFERENCE.get(
+        (games_engagement == "high", mcq_performance == "improving"), "unknown"
+    )
     
-    if games_engagement == "high" and mcq_performance == "improving":
-        behavioral_insights["engagement_preference"] = "multi_modal_learner"
-    elif games_engagement == "high":
-        behavioral_insights["engagement_preference"] = "interactive_learner"
-    elif mcq_performance == "improving":
-        behavioral_insights["engagement_preference"] = "traditional_assessments"
-    
-    # Learning momentum
-    if mcq_data.get("improvement_trend") == "improving" and attendance_rate > 85:
-        behavioral_insights["learning_momentum"] = "accelerating"
-    elif mcq_data.get("improvement_trend") == "stable" and attendance_rate > 75:
-        behavioral_insights["learning_momentum"] = "steady"
-    else:
-        behavioral_insights["learning_momentum"] = "needs_support"
+    # Learning momentum (attendance bucket: 0 = <=75, 1 = >75, 2 = >85)
+    attendance_bucket = bisect_left(_MOMENTUM_ATTENDANCE_THRESHOLDS, attendance_rate)
+    behavioral_insights["learning_momentum"] = _LEARNING_MOMENTUM.get(
+        (mcq_performance, attendance_bucket), "needs_support"
+    )
     
     return behavioral_insights
 
 
+# Overall score weights: attendance 40%, academic performance 40%, engagement 20%
+_ATTENDANCE_WEIGHT = 0.4
+_MCQ_WEIGHT = 0.4
+_WEIGHTED_ENGAGEMENT_SCORES = {
+    level: score * 0.2
+    for level, score in {"high": 85, "moderate": 70, "low": 40, "no_data": 50}.items()
+}
+
+
 def calculate_overall_progress_score(attendance_data, mcq_data, games_data, learning_progress):
     """Calculate overall progress score (0-100)."""
-    scores = []
-    
-    # Attendance score (40% weight)
-    attendance_score = attendance_data.get("attendance_percentage", 0)
-    scores.append(attendance_score * 0.4)
-    
-    # Academic performance score (40% weight)
-    mcq_score = mcq_data.get("average_score", 0)
-    scores.append(mcq_score * 0.4)
-    
-    # Engagement score (20% weight)
-    engagement_mapping = {"high": 85, "moderate": 70, "low": 40, "no_data": 50}
-    engagement_score = engagement_mapping.get(games_data.get("engagement_level", "no_data"), 50)
-    scores.append(engagement_score * 0.2)
-    
-    overall_score = sum(scores)
-    return round(overall_score, 2)
+    engagement_level = games_data.get("engagement_level", "no_data")
+    return round(
+        attendance_data.get("attendance_percentage", 0) * _ATTENDANCE_WEIGHT
+        + mcq_data.get("average_score", 0) * _MCQ_WEIGHT
+        + _WEIGHTED_ENGAGEMENT_SCORES.get(engagement_level, _WEIGHTED_ENGAGEMENT_SCORES["no_data"]),
+        2
+    )
 
 
 def generate_progress_recommendations(progress_analysis, student_profile):
@@ -498,20 +777,17 @@ def generate_progress_recommendations(progress_analysis, student_profile):
 
 def generate_progress_summary(progress_analysis):
     """Generate a comprehensive summary of student progress."""
+    att = progress_analysis["attendance_analysis"]
+    perf = progress_analysis["academic_performance"]["mcq_performance"]
+    bi = progress_analysis["behavioral_insights"]
     student_name = progress_analysis["student_name"]
     overall_score = progress_analysis["overall_score"]
-    attendance_rate = progress_analysis["attendance_analysis"]["attendance_percentage"]
-    mcq_avg = progress_analysis["academic_performance"]["mcq_performance"]["average_score"]
+    attendance_rate = att["attendance_percentage"]
+    mcq_avg = perf["average_score"]
+    learning_momentum = bi["learning_momentum"]
     
     # Overall performance level
-    if overall_score >= 85:
-        performance_level = "excellent"
-    elif overall_score >= 75:
-        performance_level = "good"
-    elif overall_score >= 65:
-        performance_level = "satisfactory"
-    else:
-        performance_level = "needs improvement"
+    performance_level = _PERFORMANCE_LEVELS[bisect_right(_PERFORMANCE_THRESHOLDS, overall_score)]
     
     summary_parts = []
     summary_parts.append(f"{student_name} demonstrates {performance_level} overall progress with a score of {overall_score}/100.")
@@ -533,10 +809,9 @@ def generate_progress_summary(progress_analysis):
         summary_parts.append(f"Academic performance needs support (MCQ average: {mcq_avg}%).")
     
     # Behavioral summary
-    behavioral_insights = progress_analysis["behavioral_insights"]
-    if behavioral_insights["learning_momentum"] == "accelerating":
+    if learning_momentum == "accelerating":
         summary_parts.append("The student shows positive learning momentum and increased engagement.")
-    elif behavioral_insights["learning_momentum"] == "steady":
+    elif learning_momentum == "steady":
         summary_parts.append("The student maintains steady progress with consistent effort.")
     else:
         summary_parts.append("The student would benefit from additional motivation and support strategies.")
@@ -564,13 +839,21 @@ def get_progress_history(
         
         clean_state_data(tool_context)
         
-        progress_analyses = tool_context.state.get("progress_analyses", {})
+        # Results are memoized per (session, student, limit) until a new analysis bumps the version
+        version = tool_context.state.get("_progress_analyses_version", 0)
+        cache_key = (cache_scope(tool_context), _name_key(student_name), limit, version)
+        cached = _HISTORY_CACHE.get(cache_key)
         
-        # Find analyses for this student
-        student_analyses = []
-        for analysis_id, analysis_data in progress_analyses.items():
-            if analysis_data.get("student_name", "").lower() == student_name.lower():
-                student_analyses.append({
+        if cached is None:
+            progress_analyses = tool_context.state.get("progress_analyses", {})
+            analysis_ids = _get_name_index(tool_context, "progress_analyses").get(_name_key(student_name), [])
+            
+            # Ids are in insertion (chronological) order: walk the newest `limit` backwards
+            recent_ids = reversed(analysis_ids[-limit:]) if limit > 0 else ()
+            cached = []
+            for analysis_id in recent_ids:
+                analysis_data = progress_analyses[analysis_id]
+                cached.append({
                     "analysis_id": analysis_id,
                     "analysis_date": analysis_data.get("analysis_date"),
                     "overall_score": analysis_data.get("overall_score"),
@@ -581,10 +864,12 @@ def get_progress_history(
                         "engagement_level": analysis_data.get("engagement_metrics", {}).get("games", {}).get("engagement_level", "no_data")
                     }
                 })
+            _HISTORY_CACHE[cache_key] = cached
         
-        # Sort by date (most recent first) and limit
-        student_analyses.sort(key=lambda x: x["analysis_date"], reverse=True)
-        student_analyses = student_analyses[:limit]
+        # Hand out copies so callers can't modify the memoized entries
+        student_analyses = [
+            {**entry, "key_metrics": dict(entry["key_metrics"])} for entry in cached
+        ]
         
         return {
             "action": "get_progress_history",
@@ -679,6 +964,8 @@ progress_analyzer_agent = Agent(
     
     For progress analysis: "Based on comprehensive data analysis, [Student] shows [overall assessment]. Key strengths include [strengths] while areas for improvement are [challenges]. I recommend [top 3 actions]."
     
+    For class-wide requests, use analyze_class_progress once instead of analyzing each student separately, then highlight the students needing support.
+    
     For teacher queries: "[Student]'s progress over the last [period] shows [key finding]. Their attendance is [rate], academic performance averages [score], and engagement level is [level]. This suggests [insight and recommendation]."
     
     **ANALYTICS INSIGHTS:**
@@ -730,6 +1017,7 @@ progress_analyzer_agent = Agent(
     """,
     tools=[
         analyze_student_progress,
+        analyze_class_progress,
         get_progress_history,
     ],
 )
\ No newline at end of file
@@ -1,36 +1,222 @@
 from google.adk.agents import Agent
 from google.adk.tools.tool_context import ToolContext
 from datetime import datetime
-from typing import List, Dict, Optional
-import json
+from typing import List, Dict, Optional, Tuple, FrozenSet
+from dataclasses import dataclass, field, replace
+from functools import lru_cache
+from collections import deque
+from itertools import count
+from operator import attrgetter, itemgetter
+from bisect import bisect_left
+from threading import Lock
+import asyncio
+import hashlib
+import logging
+import os
+import time
+from urllib.parse import quote_plus
+
+import aiohttp
+import orjson
+from cachetools import LRUCache, TTLCache
+
+from ...state_utils import STATE_PROBE_OPTIONS, cache_scope
+
+
+logger = logging.getLogger(__name__)
 
 
 def safe_json_serializable(obj):
-    """Ensure object is JSON serializable by converting problematic types."""
-    if isinstance(obj, bytes):
-        return obj.decode('utf-8', errors='ignore')
-    elif isinstance(obj, datetime):
-        return obj.isoformat()
-    elif isinstance(obj, dict):
-        return {k: safe_json_serializable(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        return [safe_json_serializable(item) for item in obj]
-    elif hasattr(obj, '__dict__'):
-        return safe_json_serializable(obj.__dict__)
-    else:
-        return obj
+    """Ensure object is JSON serializable by converting problematic types.
+    
+    Walks the structure with an explicit work queue of (parent, key, value)
+    triples instead of recursing, so deeply nested state cannot hit the
+    recursion limit.
+    """
+    root = [None]
+    work = deque([(root, 0, obj)])
+    built = {}
+    while work:
+        parent, key, value = work.popleft()
+        if isinstance(value, bytes):
+            parent[key] = value.decode('utf-8', errors='ignore')
+        elif isinstance(value, datetime):
+            parent[key] = value.isoformat()
+        elif isinstance(value, (dict, list)) or hasattr(value, '__dict__'):
+            if not isinstance(value, (dict, list)):
+                value = value.__dict__
+            # Shared (or cyclic) containers are rewritten once
+            if id(value) in built:
+                parent[key] = built[id(value)]
+                continue
+            if isinstance(value, dict):
+                rebuilt = {}
+                work.extend((rebuilt, k, v) for k, v in value.items())
+            else:
+                rebuilt = [None] * len(value)
+                work.extend((rebuilt, i, v) for i, v in enumerate(value))
+            built[id(value)] = rebuilt
+            parent[key] = rebuilt
+        else:
+            parent[key] = value
+    return root[0]
+
+
+def _mark_written(tool_context: ToolContext):
+    """Record a state write by this agent so the next clean_state_data probes again."""
+    tool_context.state["_resource_state_version"] = tool_context.state.get("_resource_state_version", 0) + 1
 
 
 def clean_state_data(tool_context: ToolContext):
-    """Clean state data to ensure JSON serializability."""
+    """Clean state data to ensure JSON serializability.
+    
+    The probe runs once per _resource_state_version: repeat calls with no
+    write from this agent in between return early.
+    """
+    version = tool_context.state.get("_resource_state_version", 0)
+    if tool_context.state.get("_resource_clean_version") == version:
+        return
     try:
-        json.dumps(tool_context.state)
-    except (TypeError, ValueError) as e:
-        print(f"Warning: State contains non-JSON serializable data: {e}")
+        orjson.dumps(tool_context.state, option=STATE_PROBE_OPTIONS)
+    except orjson.JSONEncodeError as e:
+        logger.warning("State contains non-JSON serializable data: %s", e)
         tool_context.state = safe_json_serializable(tool_context.state)
+    tool_context.state["_resource_clean_version"] = version
+
+
+# [epoch second, ISO timestamp, compact id stamp] for the last second formatted
+_last_timestamp = [0, "", ""]
+
+# Per-process suffix keeping recommendation ids unique within one second
+_recommendation_counter = count(1)
+
+
+def _timestamps():
+    """Return (ISO timestamp, YYYYmmdd_HHMMSS stamp) for now, formatted at most once per second."""
+    now = int(time.time())
+    if now != _last_timestamp[0]:
+        moment = datetime.fromtimestamp(now)
+        _last_timestamp[:] = [now, moment.isoformat(), moment.strftime('%Y%m%d_%H%M%S')]
+    return _last_timestamp[1], _last_timestamp[2]
+
+
+def _iso_now():
+    """Return the current time as an ISO string at one-second resolution."""
+    return _timestamps()[0]
+
+
+# Optional web-search backend: GET <endpoint>?q=<query> returning a JSON list of
+# resource dicts. Without it the tool falls back to the sample resources.
+_SEARCH_ENDPOINT = os.getenv("RESOURCE_SEARCH_ENDPOINT")
+_SEARCH_CONCURRENCY = 10
+
+# Shared session and semaphore, bound to the event loop that created them
+_search_session = None
+_search_semaphore = None
+_search_loop = None
+
+
+async def _get_search_session():
+    """Return the shared aiohttp session, creating it in the running event loop on first use.
+    
+    A session left over from another event loop is closed before it is replaced.
+    """
+    global _search_session, _search_semaphore, _search_loop
+    loop = asyncio.get_running_loop()
+    if _search_session is None or _search_session.closed or _search_loop is not loop:
+        stale_session, stale_loop = _search_session, _search_loop
+        _search_session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=20, keepalive_timeout=60),
+            timeout=aiohttp.ClientTimeout(total=10)
+        )
+        _search_semaphore = asyncio.Semaphore(_SEARCH_CONCURRENCY)
+        _search_loop = loop
+        if stale_session is not None and not stale_session.closed:
+            await _close_stale_session(stale_session, stale_loop)
+    return _search_session
+
+
+async def _close_stale_session(session, session_loop):
+    """Close a search session that belongs to an event loop other than the running one."""
+    try:
+        if session_loop.is_running():
+            # Still serving another thread: close it on its own loop
+            await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(session.close(), session_loop))
+        else:
+            # Its loop has finished; release the connector and mark the session closed
+            await session.close()
+    except Exception as e:
+        logger.warning("Could not close stale search session: %s", e)
+
+
+async def close_search_session():
+    """Close the shared search session; await this before its event loop shuts down."""
+    global _search_session, _search_semaphore, _search_loop
+    session = _search_session
+    _search_session = _search_semaphore = _search_loop = None
+    if session is not None and not session.closed:
+        await session.close()
+
+
+# Process-wide cache of backend results shared across sessions, since the same
+# curriculum topics are searched by many teachers. Failures are not cached.
+_SEARCH_CACHE = TTLCache(maxsize=10_000, ttl=3600)
+_SEARCH_CACHE_LOCK = Lock()
+
+
+def _search_cache_key(query, grade_level, learning_style):
+    """Hash the cache key fields into a compact 16-byte digest."""
+    return hashlib.blake2b(f"{query}|{grade_level}|{learning_style}".encode(), digest_size=16).digest()
+
+
+async def _search_one(query, grade_level=None, learning_style=None):
+    """Run one query against the search backend, bounded by the shared semaphore."""
+    key = _search_cache_key(query, grade_level, learning_style)
+    with _SEARCH_CACHE_LOCK:
+        cached = _SEARCH_CACHE.get(key)
+    if cached is not None:
+        return cached
+    
+    session = await _get_search_session()
+    async with _search_semaphore:
+        async with session.get(_SEARCH_ENDPOINT, params={"q": query}) as response:
+            response.raise_for_status()
+            result = await response.json()
+    
+    with _SEARCH_CACHE_LOCK:
+        _SEARCH_CACHE[key] = result
+    return result
+
+
+async def search_web_resources(search_queries, grade_level=None, learning_style=None):
+    """Run all search queries concurrently and merge the results.
+    
+    Failed queries are skipped; resources are de-duplicated by URL (or title),
+    keeping the first occurrence in query order. Each resource is copied so
+    cached backend results are never handed out for mutation.
+    """
+    results = await asyncio.gather(
+        *(_search_one(query, grade_level, learning_style) for query in search_queries),
+        return_exceptions=True
+    )
+    merged = {}
+    for query, result in zip(search_queries, results):
+        if isinstance(result, Exception):
+            logger.warning("Search failed for %r: %s", query, result)
+            continue
+        for resource in result or ():
+            if isinstance(resource, dict):
+                key = resource.get("url") or resource.get("title")
+                if key not in merged:
+                    merged[key] = dict(resource)
+    return list(merged.values())
+
 
+# Number of recent searches kept in resource_search_history
+_SEARCH_HISTORY_LIMIT = 50
 
-def search_educational_resources(
+
+async def search_educational_resources(
     topic: str,
     resource_type: str = "all",
     grade_level: str = None,
@@ -50,20 +236,16 @@ def search_educational_resources(
         Curated list of educational resources with recommendations
     """
     try:
-        print(f"--- Tool: search_educational_resources called for '{topic}' ---")
+        logger.debug("Tool: search_educational_resources called for %r", topic)
         
         clean_state_data(tool_context)
         
-        # This function would integrate with web search
-        # For now, providing a framework and sample structure
-        
         # Create search query based on parameters
         search_queries = generate_search_queries(topic, resource_type, grade_level, learning_style)
         
-        # Simulated resource recommendations (in real implementation, this would use web search)
         resource_recommendations = {
             "topic": topic,
-            "search_date": datetime.now().isoformat(),
+            "search_date": _iso_now(),
             "resource_type": resource_type,
             "grade_level": grade_level,
             "learning_style": learning_style,
@@ -73,29 +255,31 @@ def search_educational_resources(
             "additional_suggestions": []
         }
         
-        # Generate sample resources based on topic and preferences
-        resources = generate_sample_resources(topic, resource_type, grade_level, learning_style)
+        # Query the web-search backend concurrently when one is configured
+        resources = await search_web_resources(search_queries, grade_level, learning_style) if _SEARCH_ENDPOINT else []
+        
+        # Otherwise generate sample resources based on topic and preferences
+        if not resources:
+            resources = generate_sample_resources(topic, resource_type, grade_level, learning_style)
         resource_recommendations["resources"] = resources
         
         # Generate rationale for recommendations
         rationale = generate_recommendation_rationale(topic, resource_type, grade_level, learning_style)
         resource_recommendations["recommendation_rationale"] = rationale
         
-        # Store search history for future reference
-        search_history = tool_context.state.get("resource_search_history", [])
+        # Store search history for future reference, keeping only recent searches
+        search_history = deque(tool_context.state.get("resource_search_history", ()), maxlen=_SEARCH_HISTORY_LIMIT)
         search_record = {
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": _iso_now(),
             "topic": topic,
             "searcher": tool_context.state.get("user_name", "unknown"),
             "results_count": len(resources)
         }
         search_history.append(search_record)
         
-        # Keep only recent searches (last 50)
-        if len(search_history) > 50:
-            search_history = search_history[-50:]
-        
-        tool_context.state["resource_search_history"] = search_history
+        # State holds plain lists so it stays JSON serializable
+        tool_context.state["resource_search_history"] = list(search_history)
+        _mark_written(tool_context)
         
         clean_state_data(tool_context)
         
@@ -112,7 +296,7 @@ def search_educational_resources(
         }
         
     except Exception as e:
-        print(f"Error in search_educational_resources: {e}")
+        logger.exception("Error in search_educational_resources")
         return {
             "action": "search_educational_resources",
             "status": "error",
@@ -122,162 +306,262 @@ def search_educational_resources(
 
 def generate_search_queries(topic, resource_type, grade_level, learning_style):
     """Generate optimized search queries for finding educational resources."""
-    queries = []
-    
-    # Base query
-    base_query = f"{topic} educational resources"
-    queries.append(base_query)
-    
-    # Resource type specific queries
-    if resource_type == "videos" or resource_type == "all":
-        queries.append(f"{topic} educational videos")
-        queries.append(f"{topic} video lessons")
-        queries.append(f"learn {topic} YouTube")
-    
-    if resource_type == "articles" or resource_type == "all":
-        queries.append(f"{topic} educational articles")
-        queries.append(f"{topic} research papers")
-        queries.append(f"{topic} academic resources")
-    
-    if resource_type == "books" or resource_type == "all":
-        queries.append(f"{topic} textbooks")
-        queries.append(f"{topic} educational books")
-    
-    if resource_type == "interactive" or resource_type == "all":
-        queries.append(f"{topic} interactive learning")
-        queries.append(f"{topic} educational games")
-        queries.append(f"{topic} online simulations")
+    return list(_generate_search_queries_cached(topic, resource_type, grade_level, learning_style))
+
+
+_TYPE_QUERY_PATTERNS = {
+    "videos": ("{topic} educational videos", "{topic} video lessons", "learn {topic} YouTube"),
+    "articles": ("{topic} educational articles", "{topic} research papers", "{topic} academic resources"),
+    "books": ("{topic} textbooks", "{topic} educational books"),
+    "interactive": ("{topic} interactive learning", "{topic} educational games", "{topic} online simulations"),
+}
+
+# Resource type -> query patterns; "all" covers every type in the order above
+_QUERY_PATTERNS = {
+    **_TYPE_QUERY_PATTERNS,
+    "all": tuple(pattern for patterns in _TYPE_QUERY_PATTERNS.values() for pattern in patterns),
+}
+
+_STYLE_QUERY_PATTERNS = {
+    "visual": ("{topic} visual learning materials", "{topic} infographics diagrams"),
+    "auditory": ("{topic} podcasts audio lessons",),
+    "kinesthetic": ("{topic} hands-on activities experiments",),
+}
+
+
+@lru_cache(maxsize=512)
+def _generate_search_queries_cached(topic, resource_type, grade_level, learning_style):
+    """Build the query list once per argument combination; returned as a tuple."""
+    # Queries are dict keys so duplicates are dropped while keeping order.
+    # Base query, then resource type specific queries
+    queries = dict.fromkeys([f"{topic} educational resources"])
+    queries.update(dict.fromkeys(pattern.format(topic=topic) for pattern in _QUERY_PATTERNS.get(resource_type, ())))
     
     # Grade level specific
     if grade_level:
-        level_query = f"{topic} {grade_level} school"
-        queries.append(level_query)
+        queries[f"{topic} {grade_level} school"] = None
     
     # Learning style specific
     if learning_style:
-        if learning_style == "visual":
-            queries.append(f"{topic} visual learning materials")
-            queries.append(f"{topic} infographics diagrams")
-        elif learning_style == "auditory":
-            queries.append(f"{topic} podcasts audio lessons")
-        elif learning_style == "kinesthetic":
-            queries.append(f"{topic} hands-on activities experiments")
+        queries.update(dict.fromkeys(pattern.format(topic=topic) for pattern in _STYLE_QUERY_PATTERNS.get(learning_style, ())))
     
-    return queries[:10]  # Limit to top 10 queries
+    return tuple(queries)[:10]  # Limit to top 10 queries
 
 
 def generate_sample_resources(topic, resource_type, grade_level, learning_style):
     """Generate sample educational resources (in real implementation, this would use actual web search results)."""
-    resources = []
+    # The cached Resources are frozen; callers get fresh dicts they may mutate
+    return [
+        resource.to_dict()
+        for resource in _generate_sample_resources_cached(topic, resource_type, grade_level, learning_style)
+    ]
+
+
+@dataclass(slots=True, frozen=True)
+class Resource:
+    """An educational resource; converted to a dict only at the JSON boundary."""
+    title: str
+    type: str
+    url: str
+    source: str
+    grade_level: str
+    description: str
+    quality_score: float
+    learning_objectives: Tuple[str, ...]
+    pros: Tuple[str, ...]
+    cons: Tuple[str, ...]
+    duration: Optional[str] = None
+    reading_time: Optional[str] = None
+    pages: Optional[str] = None
+    learning_style_match: int = 0
+    # Lowercase token sets used by the filters; not part of the dict form
+    title_tokens: FrozenSet[str] = field(init=False, repr=False, compare=False)
+    desc_tokens: FrozenSet[str] = field(init=False, repr=False, compare=False)
+    grade_tokens: FrozenSet[str] = field(init=False, repr=False, compare=False)
     
-    # Video Resources
-    if resource_type in ["videos", "all"]:
-        video_resources = [
-            {
-                "title": f"Complete Guide to {topic}",
-                "type": "video",
-                "url": f"https://youtube.com/watch?v={topic.lower().replace(' ', '')}_guide",
-                "source": "YouTube Educational",
-                "duration": "15-30 minutes",
-                "grade_level": grade_level or "all levels",
-                "description": f"Comprehensive video explanation of {topic} concepts with visual demonstrations",
-                "quality_score": 4.5,
-                "learning_objectives": [
-                    f"Understand fundamental {topic} concepts",
-                    f"See practical applications of {topic}",
-                    f"Visual demonstration of key principles"
-                ],
-                "pros": ["Visual learning", "Expert instruction", "Free access"],
-                "cons": ["Requires internet", "May need supplementary materials"]
-            },
-            {
-                "title": f"{topic} Masterclass Series",
-                "type": "video_series",
-                "url": f"https://coursera.org/{topic.lower().replace(' ', '-')}-course",
-                "source": "Coursera",
-                "duration": "2-4 hours total",
-                "grade_level": "high school to college",
-                "description": f"Professional course series covering advanced {topic} topics",
-                "quality_score": 4.8,
-                "learning_objectives": [
-                    f"Master advanced {topic} techniques",
-                    f"Apply {topic} in real-world scenarios",
-                    f"Earn completion certificate"
-                ],
-                "pros": ["Professional quality", "Structured learning", "Certificate available"],
-                "cons": ["May require payment", "Time intensive"]
-            }
-        ]
-        resources.extend(video_resources)
+    def __post_init__(self):
+        object.__setattr__(self, "title_tokens", frozenset(self.title.lower().split()))
+        object.__setattr__(self, "desc_tokens", frozenset(self.description.lower().split()))
+        object.__setattr__(self, "grade_tokens", frozenset(self.grade_level.lower().split()))
     
+    def to_dict(self):
+        """Return the resource as a plain dict, omitting unset optional fields."""
+        resource = {"title": self.title, "type": self.type, "url": self.url, "source": self.source}
+        for name in ("duration", "reading_time", "pages"):
+            value = getattr(self, name)
+            if value is not None:
+                resource[name] = value
+        resource["grade_level"] = self.grade_level
+        resource["description"] = self.description
+        resource["quality_score"] = self.quality_score
+        resource["learning_objectives"] = list(self.learning_objectives)
+        resource["pros"] = list(self.pros)
+        resource["cons"] = list(self.cons)
+        if self.learning_style_match:
+            resource["learning_style_match"] = self.learning_style_match
+        return resource
+
+
+# Sample resources per resource type. String values may use {topic},
+# {slug_dash} ("solar-system"), {slug_flat} ("solarsystem") and {slug_plus}
+# ("Solar+System"); a grade_level of None means "the requested grade level,
+# else the template's _grade_default".
+_RESOURCE_TEMPLATE_SOURCE = {
+    # Video Resources
+    "videos": (
+        {
+            "title": "Complete Guide to {topic}",
+            "type": "video",
+            "url": "https://youtube.com/watch?v={slug_flat}_guide",
+            "source": "YouTube Educational",
+            "duration": "15-30 minutes",
+            "grade_level": None,
+            "_grade_default": "all levels",
+            "description": "Comprehensive video explanation of {topic} concepts with visual demonstrations",
+            "quality_score": 4.5,
+            "learning_objectives": (
+                "Understand fundamental {topic} concepts",
+                "See practical applications of {topic}",
+                "Visual demonstration of key principles"
+            ),
+            "pros": ("Visual learning", "Expert instruction", "Free access"),
+            "cons": ("Requires internet", "May need supplementary materials")
+        },
+        {
+            "title": "{topic} Masterclass Series",
+            "type": "video_series",
+            "url": "https://coursera.org/{slug_dash}-course",
+            "source": "Coursera",
+            "duration": "2-4 hours total",
+            "grade_level": "high school to college",
+            "description": "Professional course series covering advanced {topic} topics",
+            "quality_score": 4.8,
+            "learning_objectives": (
+                "Master advanced {topic} techniques",
+                "Apply {topic} in real-world scenarios",
+                "Earn completion certificate"
+            ),
+            "pros": ("Professional quality", "Structured learning", "Certificate available"),
+            "cons": ("May require payment", "Time intensive")
+        }
+    ),
     # Article Resources
-    if resource_type in ["articles", "all"]:
-        article_resources = [
-            {
-                "title": f"The Complete {topic} Reference Guide",
-                "type": "article",
-                "url": f"https://encyclopedia.com/{topic.lower().replace(' ', '-')}",
-                "source": "Educational Encyclopedia",
-                "reading_time": "10-15 minutes",
-                "grade_level": grade_level or "middle to high school",
-                "description": f"Comprehensive written guide covering all aspects of {topic}",
-                "quality_score": 4.3,
-                "learning_objectives": [
-                    f"Read detailed explanations of {topic}",
-                    f"Access referenced materials",
-                    f"Study at own pace"
-                ],
-                "pros": ["Detailed information", "Citable source", "Offline reading possible"],
-                "cons": ["Text-heavy", "May be overwhelming for beginners"]
-            }
-        ]
-        resources.extend(article_resources)
-    
+    "articles": (
+        {
+            "title": "The Complete {topic} Reference Guide",
+            "type": "article",
+            "url": "https://encyclopedia.com/{slug_dash}",
+            "source": "Educational Encyclopedia",
+            "reading_time": "10-15 minutes",
+            "grade_level": None,
+            "_grade_default": "middle to high school",
+            "description": "Comprehensive written guide covering all aspects of {topic}",
+            "quality_score": 4.3,
+            "learning_objectives": (
+                "Read detailed explanations of {topic}",
+                "Access referenced materials",
+                "Study at own pace"
+            ),
+            "pros": ("Detailed information", "Citable source", "Offline reading possible"),
+            "cons": ("Text-heavy", "May be overwhelming for beginners")
+        },
+    ),
     # Interactive Resources
-    if resource_type in ["interactive", "all"]:
-        interactive_resources = [
-            {
-                "title": f"Interactive {topic} Simulator",
-                "type": "interactive",
-                "url": f"https://phet.colorado.edu/{topic.lower().replace(' ', '-')}-sim",
-                "source": "PhET Interactive Simulations",
-                "duration": "Variable",
-                "grade_level": "middle school to college",
-                "description": f"Hands-on simulation allowing experimentation with {topic} concepts",
-                "quality_score": 4.7,
-                "learning_objectives": [
-                    f"Experiment with {topic} variables",
-                    f"Observe cause-and-effect relationships",
-                    f"Develop intuitive understanding"
-                ],
-                "pros": ["Hands-on learning", "Safe experimentation", "Free access"],
-                "cons": ["Requires computer", "May need teacher guidance"]
-            }
-        ]
-        resources.extend(interactive_resources)
-    
+    "interactive": (
+        {
+            "title": "Interactive {topic} Simulator",
+            "type": "interactive",
+            "url": "https://phet.colorado.edu/{slug_dash}-sim",
+            "source": "PhET Interactive Simulations",
+            "duration": "Variable",
+            "grade_level": "middle school to college",
+            "description": "Hands-on simulation allowing experimentation with {topic} concepts",
+            "quality_score": 4.7,
+            "learning_objectives": (
+                "Experiment with {topic} variables",
+                "Observe cause-and-effect relationships",
+                "Develop intuitive understanding"
+            ),
+            "pros": ("Hands-on learning", "Safe experimentation", "Free access"),
+            "cons": ("Requires computer", "May need teacher guidance")
+        },
+    ),
     # Book Resources
-    if resource_type in ["books", "all"]:
-        book_resources = [
-            {
-                "title": f"Essential {topic}: A Student's Guide",
-                "type": "book",
-                "url": f"https://openlibrary.org/search?q={topic.replace(' ', '+')}&mode=everything",
-                "source": "Open Library",
-                "pages": "200-300 pages",
-                "grade_level": grade_level or "high school",
-                "description": f"Comprehensive textbook covering {topic} from basics to advanced concepts",
-                "quality_score": 4.4,
-                "learning_objectives": [
-                    f"Comprehensive {topic} knowledge",
-                    f"Structured learning progression",
-                    f"Reference for future use"
-                ],
-                "pros": ["Comprehensive coverage", "Structured approach", "Permanent reference"],
-                "cons": ["Time investment required", "May be expensive if physical copy"]
-            }
-        ]
-        resources.extend(book_resources)
+    "books": (
+        {
+            "title": "Essential {topic}: A Student's Guide",
+            "type": "book",
+            "url": "https://openlibrary.org/search?q={slug_plus}&mode=everything",
+            "source": "Open Library",
+            "pages": "200-300 pages",
+            "grade_level": None,
+            "_grade_default": "high school",
+            "description": "Comprehensive textbook covering {topic} from basics to advanced concepts",
+            "quality_score": 4.4,
+            "learning_objectives": (
+                "Comprehensive {topic} knowledge",
+                "Structured learning progression",
+                "Reference for future use"
+            ),
+            "pros": ("Comprehensive coverage", "Structured approach", "Permanent reference"),
+            "cons": ("Time investment required", "May be expensive if physical copy")
+        },
+    ),
+}
+
+
+def _compile_resource_template(source):
+    """Split a template into its static fields and the fields that need formatting.
+    
+    Returns (static dict, str fields with placeholders, tuple fields with
+    placeholders, grade default or None for a fixed grade level).
+    """
+    grade_default = source.get("_grade_default")
+    static = {k: v for k, v in source.items() if k != "_grade_default"}
+    str_fields = tuple(k for k, v in static.items() if isinstance(v, str) and "{" in v)
+    tuple_fields = tuple(
+        k for k, v in static.items()
+        if isinstance(v, tuple) and any("{" in item for item in v)
+    )
+    return static, str_fields, tuple_fields, grade_default
+
+
+# Resource type -> compiled templates; "all" covers every type in the order above
+_RESOURCE_TEMPLATES = {
+    resource_type: tuple(_compile_resource_template(source) for source in sources)
+    for resource_type, sources in _RESOURCE_TEMPLATE_SOURCE.items()
+}
+_RESOURCE_TEMPLATES["all"] = tuple(
+    template for templates in _RESOURCE_TEMPLATES.values() for template in templates
+)
+
+
+@lru_cache(maxsize=1024)
+def _compute_slugs(topic):
+    """Return the (dashed, flat, query-encoded) URL slugs for a topic."""
+    lowered = topic.lower()
+    return lowered.replace(' ', '-'), lowered.replace(' ', ''), quote_plus(topic)
+
+
+@lru_cache(maxsize=512)
+def _generate_sample_resources_cached(topic, resource_type, grade_level, learning_style):
+    """Build and filter the sample resources once per argument combination.
+
+    Returns a tuple of frozen Resources so the cached result cannot be mutated.
+    """
+    slug_dash, slug_flat, slug_plus = _compute_slugs(topic)
+    values = {"topic": topic, "slug_dash": slug_dash, "slug_flat": slug_flat, "slug_plus": slug_plus}
+    
+    resources = []
+    for static, str_fields, tuple_fields, grade_default in _RESOURCE_TEMPLATES.get(resource_type, ()):
+        fields = dict(static)
+        for name in str_fields:
+            fields[name] = static[name].format_map(values)
+        for name in tuple_fields:
+            fields[name] = tuple(item.format_map(values) for item in static[name])
+        if grade_default is not None:
+            fields["grade_level"] = grade_level or grade_default
+        resources.append(Resource(**fields))
     
     # Apply learning style filtering
     if learning_style:
@@ -287,79 +571,118 @@ def generate_sample_resources(topic, resource_type, grade_level, learning_style)
     if grade_level:
         resources = filter_by_grade_level(resources, grade_level)
     
-    return resources
+    return tuple(resources)
+
+
+_VISUAL_TYPES = frozenset({"video", "interactive"})
+_READING_TYPES = frozenset({"article", "book"})
+
+
+def _score_visual(resource):
+    """Videos and interactive content suit visual learners."""
+    score = 2 if resource.type in _VISUAL_TYPES else 0
+    if "visual" in resource.desc_tokens:
+        score += 1
+    return score
+
+
+def _score_auditory(resource):
+    """Audio content and videos suit auditory learners."""
+    score = 2 if "audio" in resource.desc_tokens or "podcast" in resource.title_tokens else 0
+    if resource.type == "video":  # Videos often have audio component
+        score += 1
+    return score
+
+
+def _score_kinesthetic(resource):
+    """Interactive, hands-on content suits kinesthetic learners."""
+    score = 2 if resource.type == "interactive" else 0
+    if "hands-on" in resource.desc_tokens:
+        score += 1
+    return score
+
+
+def _score_reading(resource):
+    """Articles and books suit reading/writing learners."""
+    return 2 if resource.type in _READING_TYPES else 0
+
+
+# Learning style -> scorer returning how well a resource suits that style
+_STYLE_SCORERS = {
+    "visual": _score_visual,
+    "auditory": _score_auditory,
+    "kinesthetic": _score_kinesthetic,
+    "reading": _score_reading,
+}
+
+
+def _score_none(resource):
+    """Unknown learning styles match nothing."""
+    return 0
 
 
 def filter_by_learning_style(resources, learning_style):
-    """Filter resources based on learning style preferences."""
-    filtered = []
+    """Filter Resources based on learning style preferences."""
+    score = _STYLE_SCORERS.get(learning_style, _score_none)
     
-    for resource in resources:
-        resource_score = 0
-        
-        if learning_style == "visual":
-            if resource["type"] in ["video", "interactive"]:
-                resource_score += 2
-            if "visual" in resource["description"].lower():
-                resource_score += 1
-        
-        elif learning_style == "auditory":
-            if "audio" in resource["description"].lower() or "podcast" in resource["title"].lower():
-                resource_score += 2
-            if resource["type"] == "video":  # Videos often have audio component
-                resource_score += 1
-        
-        elif learning_style == "kinesthetic":
-            if resource["type"] == "interactive":
-                resource_score += 2
-            if "hands-on" in resource["description"].lower():
-                resource_score += 1
-        
-        elif learning_style == "reading":
-            if resource["type"] in ["article", "book"]:
-                resource_score += 2
-        
-        # Include resource if it has any relevance to learning style
-        if resource_score > 0:
-            resource["learning_style_match"] = resource_score
-            filtered.append(resource)
+    # Include resource if it has any relevance to learning style
+    filtered = [
+        replace(resource, learning_style_match=match)
+        for resource in resources
+        if (match := score(resource)) > 0
+    ]
     
     # Sort by learning style match score
-    filtered.sort(key=lambda x: x.get("learning_style_match", 0), reverse=True)
+    filtered.sort(key=attrgetter("learning_style_match"), reverse=True)
     
     return filtered
 
 
+_GRADE_LEVEL_KEYWORDS = {
+    "elementary": ["elementary", "primary", "basic", "beginner"],
+    "middle": ["middle", "intermediate", "grades 6-8"],
+    "high": ["high school", "advanced", "grades 9-12", "secondary"],
+    "college": ["college", "university", "advanced", "undergraduate"]
+}
+
+# Single-word keywords are matched against a resource's grade tokens; phrases
+# still need a substring test against the full grade-level text.
+_GRADE_LEVEL_TOKENS = {
+    level: frozenset(k for k in keywords if " " not in k)
+    for level, keywords in _GRADE_LEVEL_KEYWORDS.items()
+}
+_GRADE_LEVEL_PHRASES = {
+    level: tuple(k for k in keywords if " " in k)
+    for level, keywords in _GRADE_LEVEL_KEYWORDS.items()
+}
+
+
 def filter_by_grade_level(resources, grade_level):
-    """Filter resources based on appropriate grade level."""
-    level_keywords = {
-        "elementary": ["elementary", "primary", "basic", "beginner"],
-        "middle": ["middle", "intermediate", "grades 6-8"],
-        "high": ["high school", "advanced", "grades 9-12", "secondary"],
-        "college": ["college", "university", "advanced", "undergraduate"]
-    }
+    """Filter Resources based on appropriate grade level."""
+    level = grade_level.lower()
+    keyword_tokens = _GRADE_LEVEL_TOKENS.get(level, frozenset())
+    keyword_phrases = _GRADE_LEVEL_PHRASES.get(level, ())
+    level_is_token = " " not in level
     
     filtered = []
-    keywords = level_keywords.get(grade_level.lower(), [])
     
     for resource in resources:
-        # Check if resource is appropriate for grade level
-        resource_grade = resource.get("grade_level", "").lower()
-        is_appropriate = False
+        grade_tokens = resource.grade_tokens
         
-        # Check for direct match
-        if grade_level.lower() in resource_grade:
-            is_appropriate = True
+        # Direct match, "all levels", or a single-word keyword match
+        is_appropriate = (
+            (level_is_token and level in grade_tokens)
+            or "all" in grade_tokens
+            or not keyword_tokens.isdisjoint(grade_tokens)
+        )
         
-        # Check for "all levels"
-        if "all" in resource_grade:
-            is_appropriate = True
-        
-        # Check for keyword matches
-        for keyword in keywords:
-            if keyword in resource_grade:
-                is_appropriate = True
-                break
+        # Multi-word levels and keyword phrases fall back to substring checks
+        if not is_appropriate and (keyword_phrases or not level_is_token):
+            resource_grade = resource.grade_level.lower()
+            is_appropriate = (
+                (not level_is_token and level in resource_grade)
+                or any(phrase in resource_grade for phrase in keyword_phrases)
+            )
         
         if is_appropriate:
             filtered.append(resource)
@@ -369,6 +692,12 @@ def filter_by_grade_level(resources, grade_level):
 
 def generate_recommendation_rationale(topic, resource_type, grade_level, learning_style):
     """Generate explanation for why these resources were recommended."""
+    return list(_generate_recommendation_rationale_cached(topic, resource_type, grade_level, learning_style))
+
+
+@lru_cache(maxsize=512)
+def _generate_recommendation_rationale_cached(topic, resource_type, grade_level, learning_style):
+    """Build the rationale once per argument combination; returned as a tuple."""
     rationale = []
     
     rationale.append(f"Resources selected based on the topic '{topic}' with focus on educational quality and accessibility.")
@@ -385,15 +714,130 @@ def generate_recommendation_rationale(topic, resource_type, grade_level, learnin
     rationale.append("Quality scores based on educational value, accessibility, and user engagement.")
     rationale.append("Diverse resource types included to support different learning preferences and teaching methods.")
     
-    return rationale
+    return tuple(rationale)
 
 
 def get_resource_types_covered(resources):
-    """Get list of resource types included in recommendations."""
-    types = set()
-    for resource in resources:
-        types.add(resource.get("type", "unknown"))
-    return list(types)
+    """Get sorted list of resource types included in recommendations."""
+    return sorted({resource.get("type", "unknown") for resource in resources})
+
+
+# Saved-recommendation list views, per (cache scope, save version[, filter]).
+# Derived from state, so they stay in this process and out of session state.
+_REC_FILTER_CACHE = LRUCache(maxsize=256)
+_REC_SUMMARY_CACHE = LRUCache(maxsize=256)
+
+# Number of newest summaries kept ready for unfiltered list requests
+_SUMMARY_CACHE_LIMIT = 20
+
+
+def _get_recommendation_order(tool_context: ToolContext):
+    """Return the saved-recommendation order index, rebuilding it only when stale.
+    
+    The index keeps parallel "dates"/"ids" lists in ascending created_date order
+    with ties in reverse save order, so reading it backwards gives the same
+    newest-first order as a stable descending sort.
+    """
+    saved_recommendations = tool_context.state.get("saved_resource_recommendations", {})
+    version = tool_context.state.get("_saved_resource_recommendations_version", 0)
+    order = tool_context.state.get("_rec_sorted_keys")
+    if (
+        not order
+        or order.get("version") != version
+        or len(order.get("ids", ())) != len(saved_recommendations)
+    ):
+        dated_ids = [
+            (rec_data.get("created_date") or "", rec_id)
+            for rec_id, rec_data in saved_recommendations.items()
+        ]
+        dated_ids.sort(key=itemgetter(0), reverse=True)
+        dated_ids.reverse()
+        order = {
+            "version": version,
+            "dates": list(map(itemgetter(0), dated_ids)),
+            "ids": list(map(itemgetter(1), dated_ids))
+        }
+        tool_context.state["_rec_sorted_keys"] = order
+        _mark_written(tool_context)
+    return order
+
+
+def _index_saved_recommendation(tool_context: ToolContext, recommendation_id, created_date, replaced):
+    """Insert a newly saved recommendation into the order index and bump the version."""
+    order = _get_recommendation_order(tool_context)
+    version = tool_context.state.get("_saved_resource_recommendations_version", 0) + 1
+    tool_context.state["_saved_resource_recommendations_version"] = version
+    if replaced:
+        # An overwritten id changes position; let the next read rebuild the index
+        tool_context.state["_rec_sorted_keys"] = None
+        return
+    position = bisect_left(order["dates"], created_date)
+    order["dates"].insert(position, created_date)
+    order["ids"].insert(position, recommendation_id)
+    order["version"] = version
+    tool_context.state["_rec_sorted_keys"] = order
+
+
+def _filter_recommendation_ids(tool_context: ToolContext, topic, teacher_name):
+    """Return newest-first ids matching the filters, memoized per filter until the next save."""
+    version = tool_context.state.get("_saved_resource_recommendations_version", 0)
+    topic_key = topic.lower() if topic else ""
+    teacher_key = teacher_name.lower() if teacher_name else ""
+    cache_key = (cache_scope(tool_context), version, topic_key, teacher_key)
+    matching_ids = _REC_FILTER_CACHE.get(cache_key)
+    
+    if matching_ids is None:
+        saved_recommendations = tool_context.state.get("saved_resource_recommendations", {})
+        matching_ids = []
+        for rec_id in reversed(_get_recommendation_order(tool_context)["ids"]):
+            rec_data = saved_recommendations[rec_id]
+            # Apply topic filter
+            if topic_key and topic_key not in rec_data.get("topic", "").lower():
+                continue
+            
+            # Apply teacher filter
+            if teacher_key and teacher_key != rec_data.get("created_by", "").lower():
+                continue
+            
+            matching_ids.append(rec_id)
+        
+        matching_ids = tuple(matching_ids)
+        _REC_FILTER_CACHE[cache_key] = matching_ids
+    
+    return matching_ids
+
+
+def _summarize_recommendation(rec_id, rec_data):
+    """Create the list-view summary of a saved recommendation."""
+    return {
+        "recommendation_id": rec_id,
+        "topic": rec_data.get("topic"),
+        "created_date": rec_data.get("created_date"),
+        "created_by": rec_data.get("created_by"),
+        "resource_count": len(rec_data.get("resources", [])),
+        "usage_count": rec_data.get("usage_count", 0),
+        "rating": rec_data.get("rating"),
+        "status": rec_data.get("status")
+    }
+
+
+def _ensure_summary_cache(tool_context: ToolContext):
+    """Return the newest recommendation summaries, rebuilt only after a save.
+    
+    Holds up to _SUMMARY_CACHE_LIMIT newest-first summaries, so paging through
+    recent recommendations doesn't rebuild them on every request.
+    """
+    version = tool_context.state.get("_saved_resource_recommendations_version", 0)
+    cache_key = (cache_scope(tool_context), version)
+    summaries = _REC_SUMMARY_CACHE.get(cache_key)
+    if summaries is None:
+        saved_recommendations = tool_context.state.get("saved_resource_recommendations", {})
+        newest_ids = _filter_recommendation_ids(tool_context, None, None)[:_SUMMARY_CACHE_LIMIT]
+        summaries = tuple(
+            _summarize_recommendation(rec_id, saved_recommendations[rec_id]) for rec_id in newest_ids
+        )
+        _REC_SUMMARY_CACHE[cache_key] = summaries
+    return summaries
 
 
 def save_resource_recommendation(
@@ -414,18 +858,19 @@ def save_resource_recommendation(
         Confirmation of saved recommendation
     """
     try:
-        print(f"--- Tool: save_resource_recommendation called for '{topic}' ---")
+        logger.debug("Tool: save_resource_recommendation called for %r", topic)
         
         clean_state_data(tool_context)
         
         # Create recommendation ID
-        recommendation_id = f"rec_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{topic.replace(' ', '_')}"
+        created_date, id_stamp = _timestamps()
+        recommendation_id = f"rec_{id_stamp}_{topic.replace(' ', '_')}_{next(_recommendation_counter)}"
         
         # Create recommendation record
         recommendation = {
             "recommendation_id": recommendation_id,
             "topic": topic,
-            "created_date": datetime.now().isoformat(),
+            "created_date": created_date,
             "created_by": tool_context.state.get("user_name", "unknown"),
             "resources": recommended_resources,
             "teacher_notes": teacher_notes,
@@ -436,8 +881,11 @@ def save_resource_recommendation(
         
         # Store recommendation
         saved_recommendations = tool_context.state.get("saved_resource_recommendations", {})
+        replaced = recommendation_id in saved_recommendations
         saved_recommendations[recommendation_id] = recommendation
         tool_context.state["saved_resource_recommendations"] = saved_recommendations
+        _index_saved_recommendation(tool_context, recommendation_id, recommendation["created_date"], replaced)
+        _mark_written(tool_context)
         
         clean_state_data(tool_context)
         
@@ -450,7 +898,7 @@ def save_resource_recommendation(
         }
         
     except Exception as e:
-        print(f"Error in save_resource_recommendation: {e}")
+        logger.exception("Error in save_resource_recommendation")
         return {
             "action": "save_resource_recommendation",
             "status": "error",
@@ -461,6 +909,8 @@ def save_resource_recommendation(
 def get_saved_recommendations(
     topic: str = None,
     teacher_name: str = None,
+    offset: int = 0,
+    limit: int = 20,
     tool_context: ToolContext = None
 ) -> dict:
     """Retrieve saved resource recommendations.
@@ -468,59 +918,53 @@ def get_saved_recommendations(
     Args:
         topic: Filter by topic (optional)
         teacher_name: Filter by teacher who created it (optional)
+        offset: Number of matching recommendations to skip, newest first
+        limit: Maximum number of recommendations to return
         tool_context: Context for accessing session state
     
     Returns:
         List of saved recommendations
     """
     try:
-        print("--- Tool: get_saved_recommendations called ---")
+        logger.debug("Tool: get_saved_recommendations called")
         
         clean_state_data(tool_context)
         
-        saved_recommendations = tool_context.state.get("saved_resource_recommendations", {})
-        
-        # Filter recommendations
-        filtered_recommendations = []
-        for rec_id, rec_data in saved_recommendations.items():
-            # Apply topic filter
-            if topic and topic.lower() not in rec_data.get("topic", "").lower():
-                continue
-            
-            # Apply teacher filter
-            if teacher_name and teacher_name.lower() != rec_data.get("created_by", "").lower():
-                continue
-            
-            # Create summary for list view
-            rec_summary = {
-                "recommendation_id": rec_id,
-                "topic": rec_data.get("topic"),
-                "created_date": rec_data.get("created_date"),
-                "created_by": rec_data.get("created_by"),
-                "resource_count": len(rec_data.get("resources", [])),
-                "usage_count": rec_data.get("usage_count", 0),
-                "rating": rec_data.get("rating"),
-                "status": rec_data.get("status")
-            }
-            filtered_recommendations.append(rec_summary)
+        # Matching ids are already sorted by creation date (most recent first)
+        matching_ids = _filter_recommendation_ids(tool_context, topic, teacher_name)
+        offset = max(offset, 0)
+        page_ids = matching_ids[offset:offset + limit] if limit > 0 else ()
         
-        # Sort by creation date (most recent first)
-        filtered_recommendations.sort(key=lambda x: x["created_date"], reverse=True)
+        if not topic and not teacher_name and offset + len(page_ids) <= _SUMMARY_CACHE_LIMIT:
+            # An unfiltered page within the newest summaries
+            cached_summaries = _ensure_summary_cache(tool_context)[offset:offset + len(page_ids)]
+            filtered_recommendations = [dict(summary) for summary in cached_summaries]
+        else:
+            # Create summaries for the requested page only
+            saved_recommendations = tool_context.state.get("saved_resource_recommendations", {})
+            filtered_recommendations = [
+                _summarize_recommendation(rec_id, saved_recommendations[rec_id]) for rec_id in page_ids
+            ]
         
         return {
             "action": "get_saved_recommendations",
             "status": "success",
-            "total_found": len(filtered_recommendations),
+            "total_found": len(matching_ids),
             "recommendations": filtered_recommendations,
             "filters_applied": {
                 "topic": topic,
                 "teacher_name": teacher_name
             },
-            "message": f"Found {len(filtered_recommendations)} saved resource recommendations"
+            "pagination": {
+                "offset": offset,
+                "limit": limit,
+                "has_more": offset + len(page_ids) < len(matching_ids)
+            },
+            "message": f"Found {len(matching_ids)} saved resource recommendations"
         }
         
     except Exception as e:
-        print(f"Error in get_saved_recommendations: {e}")
+        logger.exception("Error in get_saved_recommendations")
         return {
             "action": "get_saved_recommendations",
             "status": "error",
@@ -1,8 +1,17 @@
 from google.adk.agents import Agent
 from google.adk.tools.tool_context import ToolContext
 from datetime import datetime
-from typing import List, Dict, Optional
-import json
+from typing import List, Dict, Optional, TypedDict
+from functools import lru_cache
+import contextvars
+import logging
+import re
+
+import orjson
+
+from ...state_utils import STATE_PROBE_OPTIONS
+
+logger = logging.getLogger(__name__)
 
 
 def safe_json_serializable(obj):
@@ -21,13 +30,198 @@ def safe_json_serializable(obj):
         return obj
 
 
+# Rebuild options: stringify non-str keys as the stdlib encoder does.
+_STATE_COERCE_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def _coerce(obj):
+    """orjson default hook applying the same conversions as safe_json_serializable."""
+    if isinstance(obj, (bytes, bytearray)):
+        return obj.decode('utf-8', errors='ignore')
+    if hasattr(obj, '__dict__'):
+        return obj.__dict__
+    return str(obj)
+
+
+# Set while a tool runs another tool that already checked the state on entry.
+_state_checked = contextvars.ContextVar("_state_checked", default=False)
+
+
 def clean_state_data(tool_context: ToolContext):
-    """Clean state data to ensure JSON serializability."""
+    """Clean state data to ensure JSON serializability.
+    
+    Nested tool calls made under _state_checked skip the check.
+    """
+    if _state_checked.get():
+        return
     try:
-        json.dumps(tool_context.state)
-    except (TypeError, ValueError) as e:
+        orjson.dumps(tool_context.state, option=STATE_PROBE_OPTIONS)
+    except orjson.JSONEncodeError as e:
         print(f"Warning: State contains non-JSON serializable data: {e}")
-        tool_context.state = safe_json_serializable(tool_context.state)
+        try:
+            tool_context.state = orjson.loads(
+                orjson.dumps(tool_context.state, default=_coerce, option=_STATE_COERCE_OPTIONS)
+            )
+        except orjson.JSONEncodeError:
+            tool_context.state = safe_json_serializable(tool_context.state)
+
+
+class AnswerRecord(TypedDict):
+    """One recorded answer, stored under session["answers"][question type]."""
+    question: str
+    answer: str
+    category: str
+    timestamp: str
+
+
+# Evaluation questions shared by every session. Only the first question is
+# personalized ({name}); the rest are stored by reference and never mutated.
+# A tuple of plain dicts rather than read-only proxies: sessions keep these
+# dicts in state, which must stay JSON serializable.
+_EVAL_QUESTIONS_TEMPLATE = (
+    {
+        "category": "basic_info",
+        "question": "Hi {name}! Let's start with some basic information. How old are you?",
+        "type": "age",
+        "importance": "high"
+    },
+    {
+        "category": "academic",
+        "question": "What grade/class are you currently in?",
+        "type": "grade_level",
+        "importance": "high"
+    },
+    {
+        "category": "academic",
+        "question": "Which school do you attend?",
+        "type": "school_info",
+        "importance": "medium"
+    },
+    {
+        "category": "interests",
+        "question": "What is your favorite subject in school and why?",
+        "type": "favorite_subject",
+        "importance": "high"
+    },
+    {
+        "category": "interests",
+        "question": "Which subject do you find most difficult or challenging?",
+        "type": "difficult_subject",
+        "importance": "high"
+    },
+    {
+        "category": "learning_style",
+        "question": "How do you prefer to learn new things? (reading, watching videos, hands-on activities, listening to explanations)",
+        "type": "learning_preference",
+        "importance": "high"
+    },
+    {
+        "category": "hobbies",
+        "question": "What do you like to do in your free time? What are your hobbies?",
+        "type": "hobbies",
+        "importance": "medium"
+    },
+    {
+        "category": "social",
+        "question": "Do you prefer working alone or with other students? Why?",
+        "type": "social_preference",
+        "importance": "medium"
+    },
+    {
+        "category": "motivation",
+        "question": "What motivates you to study? What are your goals?",
+        "type": "motivation",
+        "importance": "high"
+    },
+    {
+        "category": "challenges",
+        "question": "What do you find most challenging about school or learning?",
+        "type": "learning_challenges",
+        "importance": "high"
+    },
+    {
+        "category": "emotional",
+        "question": "How do you feel when you don't understand something in class?",
+        "type": "emotional_response",
+        "importance": "high"
+    },
+    {
+        "category": "activities",
+        "question": "What activities have you done recently that you enjoyed?",
+        "type": "recent_activities",
+        "importance": "medium"
+    },
+    {
+        "category": "family",
+        "question": "Does anyone at home help you with your studies? How?",
+        "type": "family_support",
+        "importance": "medium"
+    },
+    {
+        "category": "technology",
+        "question": "Are you comfortable using computers, tablets, or educational apps?",
+        "type": "tech_comfort",
+        "importance": "medium"
+    },
+    {
+        "category": "future",
+        "question": "What do you want to be when you grow up? Any dream career?",
+        "type": "career_aspirations",
+        "importance": "medium"
+    }
+)
+
+
+# Keyword classifiers over lowercased answers: (label, keywords) rules, highest
+# priority first. _compile_rules turns each table into one regex; when several
+# labels match, the earlier rule wins.
+_LEARNING_STYLE_RULES = (
+    ("kinesthetic", ("hands-on", "activities")),
+    ("auditory", ("listening", "explanation")),
+    ("reading/writing", ("reading", "text")),
+    ("visual", ("video", "watching")),
+)
+
+_EMOTION_RULES = (
+    ("needs_support", ("frustrated", "angry")),
+    ("low_confidence", ("sad", "give up")),
+    ("help_seeking", ("ask", "help")),
+)
+
+
+def _compile_rules(rules):
+    """Build one regex with a named group per label, plus the group priority order."""
+    pattern = re.compile("|".join(
+        f"(?P<g{i}>{'|'.join(map(re.escape, keywords))})"
+        for i, (_, keywords) in enumerate(rules)
+    ))
+    priority = tuple((f"g{i}", label) for i, (label, _) in enumerate(rules))
+    return pattern, priority
+
+
+_LEARNING_STYLE_RE, _LEARNING_STYLE_PRIORITY = _compile_rules(_LEARNING_STYLE_RULES)
+_EMOTION_RE, _EMOTION_PRIORITY = _compile_rules(_EMOTION_RULES)
+
+_CONFIDENT_RE = re.compile(r"easy|none")
+_COLLABORATIVE_RE = re.compile(r"group|others")
+_TECH_COMFORT_RE = re.compile(r"yes|comfortable")
+_MOTIVATION_RE = re.compile(r"goal|future")
+_RESILIENCE_RE = re.compile(r"try again|practice")
+
+
+def _classify(pattern, priority, text, default):
+    """Scan text once and return the label of the highest-priority matching group."""
+    matched = {match.lastgroup for match in pattern.finditer(text)}
+    for group, label in priority:
+        if group in matched:
+            return label
+    return default
+
+
+@lru_cache(maxsize=1024)
+def _normalize_name(name: str) -> str:
+    """Display form of a student name, cached for repeat evaluations."""
+    return name.strip().title()
 
 
 def start_student_evaluation(
@@ -44,118 +238,31 @@ def start_student_evaluation(
         Initial evaluation questions and session setup
     """
     try:
-        print(f"--- Tool: start_student_evaluation called for {student_name} ---")
+        logger.debug("Tool: start_student_evaluation called for %s", student_name)
         
         clean_state_data(tool_context)
         
-        student_name = student_name.strip().title()
+        student_name = _normalize_name(student_name)
         
         # Initialize evaluation sessions if not exists
         evaluation_sessions = tool_context.state.get("evaluation_sessions", {})
-        student_profiles = tool_context.state.get("student_profiles", {})
         
         # Create evaluation session ID
-        session_id = f"eval_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{student_name.replace(' ', '_')}"
+        now = datetime.now()
+        session_id = f"eval_{now.strftime('%Y%m%d_%H%M%S')}_{student_name.replace(' ', '_')}"
         
         # Initial comprehensive questions
+        first_question = _EVAL_QUESTIONS_TEMPLATE[0]
         evaluation_questions = [
-            {
-                "category": "basic_info",
-                "question": f"Hi {student_name}! Let's start with some basic information. How old are you?",
-                "type": "age",
-                "importance": "high"
-            },
-            {
-                "category": "academic",
-                "question": "What grade/class are you currently in?",
-                "type": "grade_level",
-                "importance": "high"
-            },
-            {
-                "category": "academic",
-                "question": "Which school do you attend?",
-                "type": "school_info",
-                "importance": "medium"
-            },
-            {
-                "category": "interests",
-                "question": "What is your favorite subject in school and why?",
-                "type": "favorite_subject",
-                "importance": "high"
-            },
-            {
-                "category": "interests",
-                "question": "Which subject do you find most difficult or challenging?",
-                "type": "difficult_subject",
-                "importance": "high"
-            },
-            {
-                "category": "learning_style",
-                "question": "How do you prefer to learn new things? (reading, watching videos, hands-on activities, listening to explanations)",
-                "type": "learning_preference",
-                "importance": "high"
-            },
-            {
-                "category": "hobbies",
-                "question": "What do you like to do in your free time? What are your hobbies?",
-                "type": "hobbies",
-                "importance": "medium"
-            },
-            {
-                "category": "social",
-                "question": "Do you prefer working alone or with other students? Why?",
-                "type": "social_preference",
-                "importance": "medium"
-            },
-            {
-                "category": "motivation",
-                "question": "What motivates you to study? What are your goals?",
-                "type": "motivation",
-                "importance": "high"
-            },
-            {
-                "category": "challenges",
-                "question": "What do you find most challenging about school or learning?",
-                "type": "learning_challenges",
-                "importance": "high"
-            },
-            {
-                "category": "emotional",
-                "question": "How do you feel when you don't understand something in class?",
-                "type": "emotional_response",
-                "importance": "high"
-            },
-            {
-                "category": "activities",
-                "question": "What activities have you done recently that you enjoyed?",
-                "type": "recent_activities",
-                "importance": "medium"
-            },
-            {
-                "category": "family",
-                "question": "Does anyone at home help you with your studies? How?",
-                "type": "family_support",
-                "importance": "medium"
-            },
-            {
-                "category": "technology",
-                "question": "Are you comfortable using computers, tablets, or educational apps?",
-                "type": "tech_comfort",
-                "importance": "medium"
-            },
-            {
-                "category": "future",
-                "question": "What do you want to be when you grow up? Any dream career?",
-                "type": "career_aspirations",
-                "importance": "medium"
-            }
+            dict(first_question, question=first_question["question"].format(name=student_name)),
+            *_EVAL_QUESTIONS_TEMPLATE[1:]
         ]
         
         # Create evaluation session
         evaluation_session = {
             "session_id": session_id,
             "student_name": student_name,
-            "start_time": datetime.now().isoformat(),
+            "start_time": now.isoformat(),
             "questions": evaluation_questions,
             "current_question_index": 0,
             "answers": {},
@@ -204,7 +311,7 @@ def record_evaluation_answer(
         Next question or completion status
     """
     try:
-        print(f"--- Tool: record_evaluation_answer called for session {session_id} ---")
+        logger.debug("Tool: record_evaluation_answer called for session %s", session_id)
         
         clean_state_data(tool_context)
         
@@ -220,8 +327,9 @@ def record_evaluation_answer(
         session = evaluation_sessions[session_id]
         current_index = session["current_question_index"]
         questions = session["questions"]
+        total = len(questions)
         
-        if current_index >= len(questions):
+        if current_index >= total:
             return {
                 "action": "record_evaluation_answer",
                 "status": "error",
@@ -229,27 +337,36 @@ def record_evaluation_answer(
             }
         
         # Record the answer
+        now_iso = datetime.now().isoformat()
         current_question = questions[current_index]
-        session["answers"][current_question["type"]] = {
-            "question": current_question["question"],
-            "answer": answer.strip(),
-            "category": current_question["category"],
-            "timestamp": datetime.now().isoformat()
-        }
+        session["answers"][current_question["type"]] = AnswerRecord(
+            question=current_question["question"],
+            answer=answer.strip(),
+            category=current_question["category"],
+            timestamp=now_iso
+        )
         
         # Move to next question
-        session["current_question_index"] += 1
+        new_idx = current_index + 1
+        session["current_question_index"] = new_idx
         
         # Check if evaluation is complete
-        if session["current_question_index"] >= len(questions):
+        completed = new_idx >= total
+        if completed:
             session["status"] = "completed"
-            session["completion_time"] = datetime.now().isoformat()
-            
-            # Trigger analysis
-            analysis_result = analyze_student_responses(session_id, tool_context)
-            
-            evaluation_sessions[session_id] = session
-            tool_context.state["evaluation_sessions"] = evaluation_sessions
+            session["completion_time"] = now_iso
+        
+        # The session was updated in place; one assignment records the change
+        tool_context.state["evaluation_sessions"] = evaluation_sessions
+        
+        if completed:
+            # Trigger analysis; the state was checked on entry, so the nested
+            # tool's own checks are skipped
+            token = _state_checked.set(True)
+            try:
+                analysis_result = analyze_student_responses(session_id, tool_context)
+            finally:
+                _state_checked.reset(token)
             
             return {
                 "action": "record_evaluation_answer",
@@ -261,22 +378,19 @@ def record_evaluation_answer(
             }
         else:
             # Provide next question
-            next_question = questions[session["current_question_index"]]
+            next_question = questions[new_idx]
             
-            evaluation_sessions[session_id] = session
-            tool_context.state["evaluation_sessions"] = evaluation_sessions
-            
-            progress = (session["current_question_index"] / len(questions)) * 100
+            progress = round(new_idx * 100.0 / total, 1)
             
             return {
                 "action": "record_evaluation_answer",
                 "status": "continuing",
                 "session_id": session_id,
-                "progress_percentage": round(progress, 1),
-                "question_number": session["current_question_index"] + 1,
-                "total_questions": len(questions),
+                "progress_percentage": progress,
+                "question_number": new_idx + 1,
+                "total_questions": total,
                 "next_question": next_question,
-                "message": f"Great answer! Let's continue... (Question {session['current_question_index'] + 1} of {len(questions)})"
+                "message": f"Great answer! Let's continue... (Question {new_idx + 1} of {total})"
             }
         
     except Exception as e:
@@ -302,9 +416,7 @@ def analyze_student_responses(
         Comprehensive analysis and insights
     """
     try:
-        print(f"--- Tool: analyze_student_responses called for session {session_id} ---")
-        
-        clean_state_data(tool_context)
+        logger.debug("Tool: analyze_student_responses called for session %s", session_id)
         
         evaluation_sessions = tool_context.state.get("evaluation_sessions", {})
         student_profiles = tool_context.state.get("student_profiles", {})
@@ -316,10 +428,14 @@ def analyze_student_responses(
         answers = session["answers"]
         student_name = session["student_name"]
         
+        # Lowercase every answer once; the classification below only reads these
+        lowered = {k: (v.get("answer") or "").lower() for k, v in answers.items()}
+        
         # Analyze different aspects
+        now_iso = datetime.now().isoformat()
         analysis = {
             "student_name": student_name,
-            "evaluation_date": datetime.now().isoformat(),
+            "evaluation_date": now_iso,
             "session_id": session_id,
             "academic_analysis": {},
             "learning_style_analysis": {},
@@ -333,67 +449,58 @@ def analyze_student_responses(
         }
         
         # Academic Analysis
-        favorite_subject = answers.get("favorite_subject", {}).get("answer", "").lower()
-        difficult_subject = answers.get("difficult_subject", {}).get("answer", "").lower()
+        favorite_subject = lowered.get("favorite_subject", "")
+        difficult_subject = lowered.get("difficult_subject", "")
         grade_level = answers.get("grade_level", {}).get("answer", "")
         
         analysis["academic_analysis"] = {
             "favorite_subject": favorite_subject,
             "challenging_subject": difficult_subject,
             "grade_level": grade_level,
-            "academic_confidence": "high" if "easy" in difficult_subject or "none" in difficult_subject else "medium"
+            "academic_confidence": "high" if _CONFIDENT_RE.search(difficult_subject) else "medium"
         }
         
         # Learning Style Analysis
-        learning_pref = answers.get("learning_preference", {}).get("answer", "").lower()
-        social_pref = answers.get("social_preference", {}).get("answer", "").lower()
-        tech_comfort = answers.get("tech_comfort", {}).get("answer", "").lower()
+        learning_pref = lowered.get("learning_preference", "")
+        social_pref = lowered.get("social_preference", "")
+        tech_comfort = lowered.get("tech_comfort", "")
         
         # Determine learning style
-        learning_style = "visual"  # default
-        if "hands-on" in learning_pref or "activities" in learning_pref:
-            learning_style = "kinesthetic"
-        elif "listening" in learning_pref or "explanation" in learning_pref:
-            learning_style = "auditory"
-        elif "reading" in learning_pref or "text" in learning_pref:
-            learning_style = "reading/writing"
-        elif "video" in learning_pref or "watching" in learning_pref:
-            learning_style = "visual"
+        learning_style = _classify(_LEARNING_STYLE_RE, _LEARNING_STYLE_PRIORITY, learning_pref, "visual")
+        
+        collaborative = _COLLABORATIVE_RE.search(social_pref) is not None
+        tech_comfort_level = "high" if _TECH_COMFORT_RE.search(tech_comfort) else "medium"
         
         analysis["learning_style_analysis"] = {
             "primary_style": learning_style,
-            "social_learning": "collaborative" if "group" in social_pref or "others" in social_pref else "independent",
-            "technology_comfort": "high" if "yes" in tech_comfort or "comfortable" in tech_comfort else "medium"
+            "social_learning": "collaborative" if collaborative else "independent",
+            "technology_comfort": tech_comfort_level
         }
         
         # Emotional Analysis
-        emotional_response = answers.get("emotional_response", {}).get("answer", "").lower()
-        motivation = answers.get("motivation", {}).get("answer", "").lower()
+        emotional_response = lowered.get("emotional_response", "")
+        motivation = lowered.get("motivation", "")
         
         # Determine emotional patterns
-        emotional_stability = "stable"
-        if "frustrated" in emotional_response or "angry" in emotional_response:
-            emotional_stability = "needs_support"
-        elif "sad" in emotional_response or "give up" in emotional_response:
-            emotional_stability = "low_confidence"
-        elif "ask" in emotional_response or "help" in emotional_response:
-            emotional_stability = "help_seeking"
+        emotional_stability = _classify(_EMOTION_RE, _EMOTION_PRIORITY, emotional_response, "stable")
+        
+        motivation_level = "high" if _MOTIVATION_RE.search(motivation) else "medium"
         
         analysis["emotional_analysis"] = {
             "emotional_stability": emotional_stability,
-            "motivation_level": "high" if "goal" in motivation or "future" in motivation else "medium",
-            "resilience": "high" if "try again" in emotional_response or "practice" in emotional_response else "medium"
+            "motivation_level": motivation_level,
+            "resilience": "high" if _RESILIENCE_RE.search(emotional_response) else "medium"
         }
         
         # Identify Strengths
         strengths = []
         if favorite_subject and favorite_subject != "none":
             strengths.append(f"Strong interest in {favorite_subject}")
-        if "collaborative" in analysis["learning_style_analysis"]["social_learning"]:
+        if collaborative:
             strengths.append("Works well with others")
-        if analysis["emotional_analysis"]["motivation_level"] == "high":
+        if motivation_level == "high":
             strengths.append("Highly motivated learner")
-        if "help_seeking" in emotional_stability:
+        if emotional_stability == "help_seeking":
             strengths.append("Comfortable asking for help")
         
         analysis["strengths"] = strengths
@@ -404,7 +511,7 @@ def analyze_student_responses(
             weaknesses.append(f"Needs support in {difficult_subject}")
         if emotional_stability == "needs_support":
             weaknesses.append("May need emotional support when facing challenges")
-        if analysis["learning_style_analysis"]["technology_comfort"] == "medium":
+        if tech_comfort_level == "medium":
             weaknesses.append("Could benefit from technology skills development")
         
         analysis["weaknesses"] = weaknesses if weaknesses else ["No significant weaknesses identified"]
@@ -431,7 +538,7 @@ def analyze_student_responses(
             recommendations.append("Teach coping strategies for handling difficult concepts")
         
         # Social learning recommendations
-        if "collaborative" in analysis["learning_style_analysis"]["social_learning"]:
+        if collaborative:
             recommendations.append("Include group projects and peer learning opportunities")
         else:
             recommendations.append("Provide individual learning paths and self-paced activities")
@@ -450,22 +557,28 @@ def analyze_student_responses(
         
         summary_parts.append(f"Their emotional response to challenges suggests they are {emotional_stability.replace('_', ' ')}.")
         
-        if analysis["learning_style_analysis"]["social_learning"] == "collaborative":
+        if collaborative:
             summary_parts.append("They prefer collaborative learning environments.")
         else:
             summary_parts.append("They work well independently.")
         
         analysis["summary"] = " ".join(summary_parts)
         
-        # Store in student profiles
+        # Store in student profiles. Both keys are assigned (ADK state records
+        # changes on assignment) and the state is checked once afterwards.
         student_profiles[student_name] = {
-            "profile_created": datetime.now().isoformat(),
+            "profile_created": now_iso,
             "last_evaluation": session_id,
             "analysis": analysis,
             "raw_answers": answers
         }
         
         tool_context.state["student_profiles"] = student_profiles
+        
+        # Lowercase name -> stored name, for case-insensitive profile lookups
+        profiles_index = tool_context.state.get("student_profiles_index", {})
+        profiles_index[student_name.lower()] = student_name
+        tool_context.state["student_profiles_index"] = profiles_index
         clean_state_data(tool_context)
         
         return analysis
@@ -489,18 +602,22 @@ def get_student_profile(
         Student's complete profile and analysis
     """
     try:
-        print(f"--- Tool: get_student_profile called for {student_name} ---")
+        logger.debug("Tool: get_student_profile called for %s", student_name)
         
         clean_state_data(tool_context)
         
         student_profiles = tool_context.state.get("student_profiles", {})
+        profiles_index = tool_context.state.get("student_profiles_index", {})
+        
+        # Rebuild the index for profiles stored before it existed
+        if len(profiles_index) < len(student_profiles):
+            profiles_index = {}
+            for name in student_profiles:
+                profiles_index.setdefault(name.lower(), name)
+            tool_context.state["student_profiles_index"] = profiles_index
         
         # Search for student (case-insensitive)
-        profile = None
-        for name, data in student_profiles.items():
-            if name.lower() == student_name.lower():
-                profile = data
-                break
+        profile = student_profiles.get(profiles_index.get(student_name.lower()))
         
         if not profile:
             return {
@@ -543,22 +660,17 @@ def get_evaluation_sessions(
         List of evaluation sessions
     """
     try:
-        print("--- Tool: get_evaluation_sessions called ---")
+        logger.debug("Tool: get_evaluation_sessions called")
         
         clean_state_data(tool_context)
         
         evaluation_sessions = tool_context.state.get("evaluation_sessions", {})
         
-        filtered_sessions = []
-        for session_id, session_data in evaluation_sessions.items():
-            # Apply filters
-            if student_name and session_data.get("student_name", "").lower() != student_name.lower():
-                continue
-            if status and session_data.get("status") != status:
-                continue
-            
+        name_lc = student_name.lower() if student_name else None
+        
+        def _summarize(session_id, session_data):
             # Create summary of session
-            session_summary = {
+            return {
                 "session_id": session_id,
                 "student_name": session_data.get("student_name"),
                 "status": session_data.get("status"),
@@ -567,7 +679,14 @@ def get_evaluation_sessions(
                 "progress": f"{len(session_data.get('answers', {}))} / {len(session_data.get('questions', []))} questions",
                 "evaluator": session_data.get("evaluator")
             }
-            filtered_sessions.append(session_summary)
+        
+        # Apply filters
+        filtered_sessions = [
+            _summarize(session_id, session_data)
+            for session_id, session_data in evaluation_sessions.items()
+            if (name_lc is None or session_data.get("student_name", "").lower() == name_lc)
+            and (not status or session_data.get("status") == status)
+        ]
         
         return {
             "action": "get_evaluation_sessions",
@@ -0,0 +1,49 @@
+// Create biological structure (cell, DNA helix, etc.)
+const group = new THREE.Group();
+
+// DNA Double Helix
+const helixGroup = new THREE.Group();
+
+for (let i = 0; i < 100; i++) {
+    const angle = i * 0.3;
+    const y = i * 0.05 - 2.5;
+
+    // First strand
+    const sphere1 = new THREE.Mesh(
+        new THREE.SphereGeometry(0.08, 8, 8),
+        new THREE.MeshLambertMaterial({ color: 0xff6b6b })
+    );
+    sphere1.position.set(
+        Math.cos(angle) * 0.8,
+        y,
+        Math.sin(angle) * 0.8
+    );
+    helixGroup.add(sphere1);
+
+    // Second strand
+    const sphere2 = new THREE.Mesh(
+        new THREE.SphereGeometry(0.08, 8, 8),
+        new THREE.MeshLambertMaterial({ color: 0x4ecdc4 })
+    );
+    sphere2.position.set(
+        Math.cos(angle + Math.PI) * 0.8,
+        y,
+        Math.sin(angle + Math.PI) * 0.8
+    );
+    helixGroup.add(sphere2);
+
+    // Base pairs (every 10th)
+    if (i % 10 === 0) {
+        const basePair = new THREE.Mesh(
+            new THREE.CylinderGeometry(0.02, 0.02, 1.6),
+            new THREE.MeshLambertMaterial({ color: 0xffe66d })
+        );
+        basePair.position.set(0, y, 0);
+        basePair.rotation.z = angle;
+        helixGroup.add(basePair);
+    }
+}
+
+group.add(helixGroup);
+mainObject = group;
+scene.add(mainObject);
@@ -0,0 +1,51 @@
+// Generic 3D visualization
+const group = new THREE.Group();
+
+// Create an interesting geometric composition
+const geometries = [
+    new THREE.BoxGeometry(1, 1, 1),
+    new THREE.SphereGeometry(0.7, 32, 32),
+    new THREE.ConeGeometry(0.6, 1.2, 8),
+    new THREE.CylinderGeometry(0.5, 0.5, 1, 8)
+];
+
+const colors = [0xff6b6b, 0x4ecdc4, 0x45b7d1, 0xf39c12, 0x9b59b6];
+
+for (let i = 0; i < 4; i++) {
+    const material = new THREE.MeshLambertMaterial({ 
+        color: colors[i],
+        transparent: true,
+        opacity: 0.8
+    });
+    const mesh = new THREE.Mesh(geometries[i], material);
+
+    // Position in a circle
+    const angle = (i / 4) * Math.PI * 2;
+    mesh.position.set(
+        Math.cos(angle) * 2,
+        Math.sin(i) * 0.5,
+        Math.sin(angle) * 2
+    );
+
+    group.add(mesh);
+}
+
+// Add connecting lines
+const lineGeometry = new THREE.BufferGeometry();
+const positions = [];
+for (let i = 0; i < 4; i++) {
+    const angle1 = (i / 4) * Math.PI * 2;
+    const angle2 = ((i + 1) % 4 / 4) * Math.PI * 2;
+    positions.push(
+        Math.cos(angle1) * 2, Math.sin(i) * 0.5, Math.sin(angle1) * 2,
+        Math.cos(angle2) * 2, Math.sin(i + 1) * 0.5, Math.sin(angle2) * 2
+    );
+}
+lineGeometry.setAttribute('position', new THREE.Float32BufferAttribute(positions, 3));
+
+const lineMaterial = new THREE.LineBasicMaterial({ color: 0xffffff, opacity: 0.6, transparent: true });
+const lines = new THREE.LineSegments(lineGeometry, lineMaterial);
+group.add(lines);
+
+mainObject = group;
+scene.add(mainObject);
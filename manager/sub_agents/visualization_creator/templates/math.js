@@ -0,0 +1,32 @@
+// Create mathematical visualization (function graph or geometric shape)
+const group = new THREE.Group();
+
+// Create a 3D function surface
+const geometry = new THREE.ParametricGeometry((u, v, target) => {
+    const x = (u - 0.5) * 4;
+    const z = (v - 0.5) * 4;
+    const y = Math.sin(x) * Math.cos(z) * 0.5;
+    target.set(x, y, z);
+}, 50, 50);
+
+const material = new THREE.MeshLambertMaterial({ 
+    color: 0x44aa88,
+    wireframe: false,
+    transparent: true,
+    opacity: 0.8
+});
+
+const surface = new THREE.Mesh(geometry, material);
+group.add(surface);
+
+// Add coordinate axes
+const axesHelper = new THREE.AxesHelper(3);
+group.add(axesHelper);
+
+// Add grid
+const gridHelper = new THREE.GridHelper(6, 20, 0x444444, 0x444444);
+gridHelper.position.y = -1;
+group.add(gridHelper);
+
+mainObject = group;
+scene.add(mainObject);
@@ -0,0 +1,44 @@
+// Create atomic structure or molecular model
+const group = new THREE.Group();
+
+// Central nucleus
+const nucleusGeometry = new THREE.SphereGeometry(0.3, 32, 32);
+const nucleusMaterial = new THREE.MeshLambertMaterial({ color: 0xff4444 });
+const nucleus = new THREE.Mesh(nucleusGeometry, nucleusMaterial);
+group.add(nucleus);
+
+// Electron orbits and electrons
+for (let i = 0; i < 3; i++) {
+    // Orbit ring
+    const orbitGeometry = new THREE.RingGeometry(1 + i * 0.8, 1.02 + i * 0.8, 64);
+    const orbitMaterial = new THREE.MeshBasicMaterial({ 
+        color: 0x4488ff, 
+        transparent: true, 
+        opacity: 0.3,
+        side: THREE.DoubleSide 
+    });
+    const orbit = new THREE.Mesh(orbitGeometry, orbitMaterial);
+    orbit.rotation.x = Math.PI / 2;
+    orbit.rotation.z = i * Math.PI / 6;
+    group.add(orbit);
+
+    // Electron
+    const electronGeometry = new THREE.SphereGeometry(0.1, 16, 16);
+    const electronMaterial = new THREE.MeshLambertMaterial({ color: 0x44ff44 });
+    const electron = new THREE.Mesh(electronGeometry, electronMaterial);
+    const radius = 1 + i * 0.8;
+    electron.position.set(radius, 0, 0);
+
+    // Animate electron orbit
+    const electronOrbit = new THREE.Group();
+    electronOrbit.add(electron);
+    electronOrbit.rotation.x = Math.PI / 2;
+    electronOrbit.rotation.z = i * Math.PI / 6;
+    group.add(electronOrbit);
+
+    // Store reference for animation
+    electron.userData = { orbitGroup: electronOrbit, speed: 0.02 + i * 0.01 };
+}
+
+mainObject = group;
+scene.add(mainObject);
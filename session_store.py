@@ -0,0 +1,32 @@
+from contextlib import closing
+from functools import lru_cache
+import logging
+import sqlite3
+
+from google.adk.sessions import DatabaseSessionService
+
+
+logger = logging.getLogger(__name__)
+
+SQLITE_PREFIX = "sqlite:///"
+
+
+def _enable_wal(db_url):
+    """Switch a SQLite database file to WAL journaling so reads don't block on writes."""
+    path = db_url[len(SQLITE_PREFIX):]
+    if not path or path == ":memory:":
+        return
+    try:
+        # journal_mode=WAL is stored in the database file, so setting it once is enough
+        with closing(sqlite3.connect(path)) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+    except sqlite3.Error as e:
+        logger.warning("Could not enable WAL for %s: %s", path, e)
+
+
+@lru_cache(maxsize=None)
+def get_service(db_url):
+    """Return the shared DatabaseSessionService for a database URL."""
+    if db_url.startswith(SQLITE_PREFIX):
+        _enable_wal(db_url)
+    return DatabaseSessionService(db_url=db_url)
@@ -1,7 +1,14 @@
 from google.genai import types
+import asyncio
+from collections import deque
 from datetime import datetime
-import json
+from functools import lru_cache, partial
+import copy
+import heapq
 import os
+import sys
+
+import orjson
 
 
 # ANSI color codes for terminal output
@@ -31,204 +38,307 @@ class Colors:
     BG_WHITE = "\033[47m"
 
 
-def display_session_state(session_service, app_name, user_id, session_id, label="Current State"):
-    """Display the current session state in a formatted way."""
+# Banners are rendered once here; hot paths only interpolate the dynamic part.
+AGENT_BANNER_TOP = "\n%s%s%s╔══ AGENT RESPONSE ═══════════════════════════════════════════%s" % (
+    Colors.BG_BLUE, Colors.WHITE, Colors.BOLD, Colors.RESET
+)
+AGENT_BANNER_BOTTOM = "%s%s%s╚═══════════════════════════════════════════════════════════════%s\n" % (
+    Colors.BG_BLUE, Colors.WHITE, Colors.BOLD, Colors.RESET
+)
+AGENT_RESPONSE_LINE = "%s%s%%s%s" % (Colors.CYAN, Colors.BOLD, Colors.RESET)
+NO_TEXT_BANNER = "\n%s%s%s==> Final Agent Response: [No text content in final event]%s\n" % (
+    Colors.BG_RED, Colors.WHITE, Colors.BOLD, Colors.RESET
+)
+RUNNING_QUERY_BANNER = "\n%s%s%s--- Running Query: %%s ---%s" % (
+    Colors.BG_GREEN, Colors.BLACK, Colors.BOLD, Colors.RESET
+)
+INSIDE_TRY_BANNER = "\n%s%s%s--- Inside try block: %%s ---%s" % (
+    Colors.BG_GREEN, Colors.BLACK, Colors.BOLD, Colors.RESET
+)
+
+STATE_BEFORE_LABEL = "State BEFORE processing"
+STATE_AFTER_LABEL = "State AFTER processing"
+STATE_UNCHANGED_LINE = "\n%s %s %s" % ("-" * 15, "State unchanged by this query", "-" * 15)
+
+
+@lru_cache(maxsize=32)
+def _state_bars(label):
+    """Return the (header, footer) separator lines framing a state label."""
+    return "\n%s %s %s" % ("-" * 15, label, "-" * 15), "-" * (32 + len(label))
+
+
+# Build the frames for the labels used on every agent call up front
+_state_bars(STATE_BEFORE_LABEL)
+_state_bars(STATE_AFTER_LABEL)
+
+
+# State sections that display_session_state renders beyond the user line
+_DETAIL_KEYS = frozenset({"preferences", "attendance_records", "interaction_history"})
+
+
+def _emit(buf):
+    """Write the buffered lines to stdout in a single call."""
+    if buf:
+        sys.stdout.write("\n".join(buf) + "\n")
+
+
+def display_session_state(session_service, app_name, user_id, session_id, label="Current State", session=None):
+    """Display the current session state in a formatted way.
+
+    Pass ``session`` when the caller already holds it to skip the fetch.
+    """
+    buf = []
+    out = buf.append
     try:
-        session = session_service.get_session(
-            app_name=app_name, user_id=user_id, session_id=session_id
-        )
+        if session is None:
+            session = session_service.get_session(
+                app_name=app_name, user_id=user_id, session_id=session_id
+            )
         
         # Format the output with clear sections
-        print(f"\n{'-' * 15} {label} {'-' * 15}")
+        header, footer = _state_bars(label)
+        out(header)
         
         # Handle the user info
         user_name = session.state.get("user_name", "Unknown")
         user_role = session.state.get("user_role", "Unknown")
         session_count = session.state.get("session_count", 0)
         
-        print(f"👤 User: {user_name} ({user_role})")
-        print(f"📊 Session Count: {session_count}")
+        out(f"👤 User: {user_name} ({user_role})")
+        out(f"📊 Session Count: {session_count}")
+        
+        # Fresh sessions carry none of the detail sections
+        if _DETAIL_KEYS.isdisjoint(session.state.keys()):
+            out(footer)
+            _emit(buf)
+            return
         
         # Handle preferences
         preferences = session.state.get("preferences", {})
         if preferences:
-            print(f"⚙️  Preferences:")
+            out(f"⚙️  Preferences:")
             for key, value in preferences.items():
-                print(f"   {key}: {value}")
+                out(f"   {key}: {value}")
         
         # Handle attendance records count
         attendance_records = session.state.get("attendance_records", {})
         if attendance_records:
-            print(f"📋 Attendance Records: {len(attendance_records)} total")
+            out(f"📋 Attendance Records: {len(attendance_records)} total")
             
             # Show recent attendance activity (last 5 records)
-            recent_records = sorted(
-                attendance_records.values(), 
-                key=lambda x: x.get("timestamp", ""), 
-                reverse=True
-            )[:5]
+            recent_records = heapq.nlargest(
+                5,
+                attendance_records.values(),
+                key=lambda x: x.get("timestamp", ""),
+            )
             
             if recent_records:
-                print("   Recent Activity:")
-                for record in recent_records:
-                    date = record.get("date", "N/A")
-                    student = record.get("student_name", "N/A")
-                    subject = record.get("subject", "N/A")
-                    status = record.get("status", "N/A")
-                    print(f"     {date}: {student} - {subject} ({status})")
+                out("   Recent Activity:")
+                buf.extend([
+                    "     %s: %s - %s (%s)" % (
+                        record.get("date", "N/A"),
+                        record.get("student_name", "N/A"),
+                        record.get("subject", "N/A"),
+                        record.get("status", "N/A"),
+                    )
+                    for record in recent_records
+                ])
         
         # Handle interaction history count
         interaction_history = session.state.get("interaction_history", [])
         if interaction_history:
-            print(f"💬 Interaction History: {len(interaction_history)} entries")
+            out(f"💬 Interaction History: {len(interaction_history)} entries")
             
             # Show recent interactions (last 3)
             recent_interactions = interaction_history[-3:] if len(interaction_history) > 3 else interaction_history
             if recent_interactions:
-                print("   Recent Interactions:")
+                out("   Recent Interactions:")
                 for interaction in recent_interactions:
                     timestamp = interaction.get("timestamp", "N/A")
                     query_type = interaction.get("type", "general")
-                    print(f"     {timestamp}: {query_type}")
+                    out(f"     {timestamp}: {query_type}")
         
-        print("-" * (32 + len(label)))
+        out(footer)
         
+    except Exception as e:
+        out(f"Error displaying session state: {e}")
+    _emit(buf)
+
+
+def _fetch_session(session_service, app_name, user_id, session_id):
+    """Fetch a session once for display, or None if it cannot be loaded."""
+    try:
+        return session_service.get_session(
+            app_name=app_name, user_id=user_id, session_id=session_id
+        )
     except Exception as e:
         print(f"Error displaying session state: {e}")
+        return None
+
+
+async def _drain(queue, batch_size=32):
+    """Write queued output blocks to stdout until a None sentinel arrives."""
+    while True:
+        batch = [await queue.get()]
+        while len(batch) < batch_size and not queue.empty():
+            batch.append(queue.get_nowait())
+        done = batch[-1] is None
+        if done:
+            batch.pop()
+        _emit(batch)
+        if done:
+            return
+
 
+async def process_agent_response(event, queue=None):
+    """Process and display agent response events.
 
-async def process_agent_response(event):
-    """Process and display agent response events."""
+    With a ``queue`` the output is handed to its writer task instead of
+    being written directly.
+    """
+    buf = []
+    out = buf.append
     # Log basic event info
-    print(f"Event ID: {event.id}, Author: {event.author}")
+    out(f"Event ID: {event.id}, Author: {event.author}")
     
     # Check for specific parts first
-    has_specific_part = False
-    if event.content and event.content.parts:
-        for part in event.content.parts:
-            if hasattr(part, "executable_code") and part.executable_code:
+    parts = event.content.parts if event.content else None
+    if parts:
+        for part in parts:
+            executable_code = getattr(part, "executable_code", None)
+            if executable_code:
                 # Access the actual code string via .code
-                print(
-                    f"  Debug: Agent generated code:\n```python\n{part.executable_code.code}\n```"
+                out(
+                    f"  Debug: Agent generated code:\n```python\n{executable_code.code}\n```"
                 )
-                has_specific_part = True
-            elif hasattr(part, "code_execution_result") and part.code_execution_result:
+                continue
+            code_execution_result = getattr(part, "code_execution_result", None)
+            if code_execution_result:
                 # Access outcome and output correctly
-                print(
-                    f"  Debug: Code Execution Result: {part.code_execution_result.outcome} - Output:\n{part.code_execution_result.output}"
+                out(
+                    f"  Debug: Code Execution Result: {code_execution_result.outcome} - Output:\n{code_execution_result.output}"
                 )
-                has_specific_part = True
-            elif hasattr(part, "tool_response") and part.tool_response:
+                continue
+            tool_response = getattr(part, "tool_response", None)
+            if tool_response:
                 # Print tool response information
-                print(f"  Tool Response: {part.tool_response.output}")
-                has_specific_part = True
+                out(f"  Tool Response: {tool_response.output}")
+                continue
             # Also print any text parts found in any event for debugging
-            elif hasattr(part, "text") and part.text and not part.text.isspace():
-                print(f"  Text: '{part.text.strip()}'")
+            text = getattr(part, "text", None)
+            if text and not text.isspace():
+                out(f"  Text: '{text.strip()}'")
     
     # Check for final response after specific parts
     final_response = None
     if event.is_final_response():
-        if (
-            event.content
-            and event.content.parts
-            and hasattr(event.content.parts[0], "text")
-            and event.content.parts[0].text
-        ):
-            final_response = event.content.parts[0].text.strip()
+        text = getattr(parts[0], "text", None) if parts else None
+        if text:
+            final_response = text.strip()
             # Use colors and formatting to make the final response stand out
-            print(
-                f"\n{Colors.BG_BLUE}{Colors.WHITE}{Colors.BOLD}╔══ AGENT RESPONSE ═══════════════════════════════════════════{Colors.RESET}"
-            )
-            print(f"{Colors.CYAN}{Colors.BOLD}{final_response}{Colors.RESET}")
-            print(
-                f"{Colors.BG_BLUE}{Colors.WHITE}{Colors.BOLD}╚═══════════════════════════════════════════════════════════════{Colors.RESET}\n"
-            )
+            out(AGENT_BANNER_TOP)
+            out(AGENT_RESPONSE_LINE % final_response)
+            out(AGENT_BANNER_BOTTOM)
         else:
-            print(
-                f"\n{Colors.BG_RED}{Colors.WHITE}{Colors.BOLD}==> Final Agent Response: [No text content in final event]{Colors.RESET}\n"
-            )
+            out(NO_TEXT_BANNER)
     
+    if queue is None:
+        _emit(buf)
+    else:
+        queue.put_nowait("\n".join(buf))
     return final_response
 
 
 async def call_agent_async(runner, user_id, session_id, query):
     """Call the agent asynchronously with the user's query."""
     content = types.Content(role="user", parts=[types.Part(text=query)])
-    print(
-        f"\n{Colors.BG_GREEN}{Colors.BLACK}{Colors.BOLD}--- Running Query: {query} ---{Colors.RESET}"
-    )
+    print(RUNNING_QUERY_BANNER % query)
     final_response_text = None
     
+    # Bind the session key once for both state displays
+    session_key = (runner.session_service, runner.app_name, user_id, session_id)
+    fetch = partial(_fetch_session, *session_key)
+    display = partial(display_session_state, *session_key)
+
     # Display state before processing
-    display_session_state(
-        runner.session_service,
-        runner.app_name,
-        user_id,
-        session_id,
-        "State BEFORE processing",
-    )
+    session = fetch()
+    if session is not None:
+        display(STATE_BEFORE_LABEL, session=session)
     
+    # Event output is queued and written by a separate task while the
+    # agent is busy producing the next event
+    queue = asyncio.Queue()
+    state_dirty = False
+    writer_task = asyncio.create_task(_drain(queue))
     try:
-        print(
-            f"\n{Colors.BG_GREEN}{Colors.BLACK}{Colors.BOLD}--- Inside try block: {query} ---{Colors.RESET}"
-        )
+        queue.put_nowait(INSIDE_TRY_BANNER % query)
         async for event in runner.run_async(
             user_id=user_id, session_id=session_id, new_message=content
         ):
-            print(
-                f"\n{Colors.BG_GREEN}{Colors.BLACK}{Colors.BOLD}--- Inside try block: {query} ---{Colors.RESET}"
-            )
+            queue.put_nowait(INSIDE_TRY_BANNER % query)
+            actions = getattr(event, "actions", None)
+            if actions is not None and getattr(actions, "state_delta", None):
+                state_dirty = True
             # Process each event and get the final response if available
-            response = await process_agent_response(event)
+            response = await process_agent_response(event, queue)
             if response:
                 final_response_text = response
     except Exception as e:
-        print(f"Error during agent call: {e}")
+        queue.put_nowait(f"Error during agent call: {e}")
+    finally:
+        queue.put_nowait(None)
+        await writer_task
     
-    # Display state after processing the message
-    display_session_state(
-        runner.session_service,
-        runner.app_name,
-        user_id,
-        session_id,
-        "State AFTER processing",
-    )
+    # Only events carrying a state delta change the stored state; without
+    # one the BEFORE display still holds and the re-fetch is skipped
+    if not state_dirty:
+        print(STATE_UNCHANGED_LINE)
+        return final_response_text
+    
+    # The run mutated the stored state, so the pre-run session is stale here
+    session = fetch()
+    if session is not None:
+        display(STATE_AFTER_LABEL, session=session)
     
     return final_response_text
 
 
+def iter_user_sessions_summary(session_service, app_name, user_id):
+    """Yield a summary dict for each of the user's sessions as it is loaded."""
+    sessions = session_service.list_sessions(app_name=app_name, user_id=user_id)
+    
+    for session in sessions.sessions:
+        try:
+            full_session = session_service.get_session(
+                app_name=app_name, user_id=user_id, session_id=session.id
+            )
+            
+            state = full_session.state
+            interaction_history = state.get("interaction_history") or ()
+            yield {
+                "session_id": session.id,
+                "created_at": session.created_at,
+                "user_name": state.get("user_name", "Unknown"),
+                "user_role": state.get("user_role", "Unknown"),
+                "session_count": state.get("session_count", 0),
+                "attendance_records_count": len(state.get("attendance_records") or ()),
+                "interaction_count": len(interaction_history),
+                "preferences": state.get("preferences", {}),
+                "last_interaction": interaction_history[-1] if interaction_history else None
+            }
+        except Exception as e:
+            print(f"Error getting session {session.id}: {e}")
+            continue
+
+
 def get_user_sessions_summary(session_service, app_name, user_id):
     """Get a summary of all sessions for a user."""
     try:
-        sessions = session_service.list_sessions(app_name=app_name, user_id=user_id)
+        session_summaries = list(iter_user_sessions_summary(session_service, app_name, user_id))
         
-        if not sessions.sessions:
+        if not session_summaries:
             return {"message": "No sessions found for this user", "sessions": []}
         
-        session_summaries = []
-        for session in sessions.sessions:
-            try:
-                full_session = session_service.get_session(
-                    app_name=app_name, user_id=user_id, session_id=session.id
-                )
-                
-                summary = {
-                    "session_id": session.id,
-                    "created_at": session.created_at,
-                    "user_name": full_session.state.get("user_name", "Unknown"),
-                    "user_role": full_session.state.get("user_role", "Unknown"),
-                    "session_count": full_session.state.get("session_count", 0),
-                    "attendance_records_count": len(full_session.state.get("attendance_records", {})),
-                    "interaction_count": len(full_session.state.get("interaction_history", [])),
-                    "preferences": full_session.state.get("preferences", {}),
-                    "last_interaction": full_session.state.get("interaction_history", [])[-1] if full_session.state.get("interaction_history") else None
-                }
-                session_summaries.append(summary)
-            except Exception as e:
-                print(f"Error getting session {session.id}: {e}")
-                continue
-        
         return {
             "message": f"Found {len(session_summaries)} sessions for user {user_id}",
             "sessions": session_summaries
@@ -238,6 +348,13 @@ def get_user_sessions_summary(session_service, app_name, user_id):
         return {"error": f"Error retrieving sessions: {e}", "sessions": []}
 
 
+# Backup directories already created or found by backup_session_data
+_backup_dirs = set()
+
+# Match the stdlib json backups: int keys become strings, datetimes go through str()
+_BACKUP_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+
 def backup_session_data(session_service, app_name, user_id, session_id, backup_file):
     """Backup session data to a JSON file."""
     try:
@@ -255,18 +372,22 @@ def backup_session_data(session_service, app_name, user_id, session_id, backup_f
             "agent_type": "sahayak_educational_agent"
         }
         
-        # Ensure backup directory exists
+        # Ensure backup directory exists; each directory is checked once per process
         backup_dir = os.path.dirname(backup_file)
-        if backup_dir and not os.path.exists(backup_dir):
-            os.makedirs(backup_dir)
+        if backup_dir and backup_dir not in _backup_dirs:
+            os.makedirs(backup_dir, exist_ok=True)
+            _backup_dirs.add(backup_dir)
         
-        with open(backup_file, 'w') as f:
-            json.dump(backup_data, f, indent=2, default=str)
+        # orjson encodes straight to bytes, written with a single call
+        payload = orjson.dumps(backup_data, default=str, option=_BACKUP_OPTIONS)
+        with open(backup_file, 'wb') as f:
+            f.write(payload)
+        backup_size = len(payload)
         
         return {
             "status": "success", 
             "message": f"Session data backed up to {backup_file}",
-            "backup_size": os.path.getsize(backup_file),
+            "backup_size": backup_size,
             "records_count": {
                 "attendance_records": len(backup_data["state"].get("attendance_records", {})),
                 "interaction_history": len(backup_data["state"].get("interaction_history", []))
@@ -280,24 +401,30 @@ def backup_session_data(session_service, app_name, user_id, session_id, backup_f
 def restore_session_data(session_service, backup_file):
     """Restore session data from a JSON backup file."""
     try:
-        if not os.path.exists(backup_file):
+        # One bytes read parsed in a single pass; the open doubles as the
+        # existence check
+        try:
+            with open(backup_file, 'rb') as f:
+                backup_data = orjson.loads(f.read())
+        except FileNotFoundError:
             return {"status": "error", "message": f"Backup file {backup_file} not found"}
         
-        with open(backup_file, 'r') as f:
-            backup_data = json.load(f)
-        
         # Validate backup data structure
         required_fields = ["app_name", "user_id", "state"]
         for field in required_fields:
             if field not in backup_data:
                 return {"status": "error", "message": f"Invalid backup file: missing {field}"}
         
+        # The restored copy is a new session; it gets a fresh in-process cache scope
+        state = backup_data["state"]
+        state.pop("_cache_scope", None)
+        
         # Create/update session with backed up data
         try:
             new_session = session_service.create_session(
                 app_name=backup_data["app_name"],
                 user_id=backup_data["user_id"],
-                state=backup_data["state"]
+                state=state
             )
             session_id = new_session.id
         except Exception:
@@ -325,6 +452,21 @@ def restore_session_data(session_service, backup_file):
         return {"status": "error", "message": f"Restore failed: {e}"}
 
 
+# Schema that migrate_session_data brings older session states up to
+_EXPECTED_SCHEMA = {
+    "user_name": "",
+    "user_role": "",
+    "session_count": 0,
+    "preferences": {
+        "language": "english",
+        "difficulty_level": "medium",
+        "subjects": []
+    },
+    "interaction_history": [],
+    "attendance_records": {},
+}
+
+
 def migrate_session_data(session_service, app_name, user_id, session_id):
     """Migrate session data to ensure compatibility with current schema."""
     try:
@@ -332,32 +474,22 @@ def migrate_session_data(session_service, app_name, user_id, session_id):
             app_name=app_name, user_id=user_id, session_id=session_id
         )
         
-        # Define expected schema
-        expected_schema = {
-            "user_name": "",
-            "user_role": "",
-            "session_count": 0,
-            "preferences": {
-                "language": "english",
-                "difficulty_level": "medium",
-                "subjects": []
-            },
-            "interaction_history": [],
-            "attendance_records": {},
-        }
+        state = session.state
         
-        # Check and update schema
-        updated = False
-        for key, default_value in expected_schema.items():
-            if key not in session.state:
-                session.state[key] = default_value
-                updated = True
-            elif key == "preferences" and isinstance(session.state[key], dict):
-                # Update preferences sub-schema
-                for pref_key, pref_default in expected_schema["preferences"].items():
-                    if pref_key not in session.state[key]:
-                        session.state[key][pref_key] = pref_default
-                        updated = True
+        # Check and update schema; defaults are deep-copied so sessions
+        # never share the module-level containers
+        missing = [key for key in _EXPECTED_SCHEMA if key not in state]
+        for key in missing:
+            state[key] = copy.deepcopy(_EXPECTED_SCHEMA[key])
+        updated = bool(missing)
+        
+        preferences = state["preferences"]
+        if "preferences" not in missing and isinstance(preferences, dict):
+            # Update preferences sub-schema
+            for pref_key, pref_default in _EXPECTED_SCHEMA["preferences"].items():
+                if pref_key not in preferences:
+                    preferences[pref_key] = copy.deepcopy(pref_default)
+                    updated = True
         
         if updated:
             # Note: ADK handles state updates automatically through tools
@@ -460,13 +592,11 @@ def log_interaction(session_service, app_name, user_id, session_id, interaction_
             "session_count": session.state.get("session_count", 0)
         }
         
-        # Add to interaction history
-        interaction_history = session.state.get("interaction_history", [])
+        # Add to interaction history, keeping only the last 100 interactions
+        # to prevent excessive growth; the deque evicts without re-slicing
+        interaction_history = deque(session.state.get("interaction_history", []), maxlen=100)
         interaction_history.append(interaction_entry)
-        
-        # Keep only last 100 interactions to prevent excessive growth
-        if len(interaction_history) > 100:
-            interaction_history = interaction_history[-100:]
+        session.state["interaction_history"] = list(interaction_history)
         
         # Note: In real usage, this would be handled by agent tools
         # This function is for demonstration and external logging
@@ -1,4 +1,6 @@
 import asyncio
+import copy
+import functools
 import sys
 import os
 from datetime import datetime, date, timedelta
@@ -7,33 +9,44 @@ from datetime import datetime, date, timedelta
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from google.adk.runners import Runner
-from google.adk.sessions import DatabaseSessionService
+from session_store import get_service
 from session_utils import call_agent_async, display_session_state, get_user_sessions_summary
 from manager.sub_agents.attendance_agent.agent import attendance_agent
 
 # Database configuration
 db_url = "sqlite:///./test_attendance_data.db"
-session_service = DatabaseSessionService(db_url=db_url)
+session_service = get_service(db_url)
 
 # Application constants
 APP_NAME = "Attendance Test System"
 TEACHER_USER_ID = "teacher_001"
 ADMIN_USER_ID = "admin_001"
 
+_TEST_STATE_PROTOTYPE = {
+    "user_name": "Test Teacher",
+    "user_role": "teacher",
+    "session_count": 1,
+    "preferences": {
+        "language": "english",
+        "difficulty_level": "medium",
+        "subjects": ["Mathematics", "Science", "English"]
+    },
+    "attendance_records": {},
+    "interaction_history": []
+}
+
 def initialize_test_state():
     """Initialize test state for attendance system."""
-    return {
-        "user_name": "Test Teacher",
-        "user_role": "teacher",
-        "session_count": 1,
-        "preferences": {
-            "language": "english",
-            "difficulty_level": "medium",
-            "subjects": ["Mathematics", "Science", "English"]
-        },
-        "attendance_records": {},
-        "interaction_history": []
-    }
+    return copy.deepcopy(_TEST_STATE_PROTOTYPE)
+
+# Upper bound, in seconds, for the pause after consecutive failed queries
+MAX_BACKOFF = 8
+
+async def _back_off(backoff):
+    """Pause after a failed query, doubling the delay on each consecutive failure."""
+    backoff = min(backoff * 2 or 1, MAX_BACKOFF)
+    await asyncio.sleep(backoff)
+    return backoff
 
 async def run_attendance_tests():
     """Run comprehensive tests for the attendance system."""
@@ -102,27 +115,31 @@ async def run_attendance_tests():
         "Show me all attendance records for today.",
     ]
     
+    # Bind the session once for every query and display below
+    ask = functools.partial(call_agent_async, runner, TEACHER_USER_ID, session_id)
+    display = functools.partial(display_session_state, session_service, APP_NAME, TEACHER_USER_ID, session_id)
+    
     # Run each test query
+    backoff = 0
     for i, query in enumerate(test_queries, 1):
         print(f"\n{'='*20} TEST {i:02d} {'='*20}")
         print(f"Query: {query}")
         print("-" * 50)
         
         try:
-            response = await call_agent_async(runner, TEACHER_USER_ID, session_id, query)
+            response = await ask(query)
             if response:
                 print(f"Success: Query processed")
             else:
                 print("Warning: No response received")
+            backoff = 0
         except Exception as e:
             print(f"Error: {e}")
-        
-        # Small delay between tests
-        await asyncio.sleep(1)
+            backoff = await _back_off(backoff)
     
     # Final state display
     print(f"\n{'='*20} FINAL SESSION STATE {'='*20}")
-    display_session_state(session_service, APP_NAME, TEACHER_USER_ID, session_id, "Final State")
+    display("Final State")
     
     # Session summary
     print(f"\n{'='*20} SESSION SUMMARY {'='*20}")
@@ -168,23 +185,25 @@ async def demo_bulk_attendance():
         "What's the attendance rate for English class?",
     ]
     
+    ask = functools.partial(call_agent_async, runner, ADMIN_USER_ID, bulk_session_id)
+    backoff = 0
     for query in bulk_queries:
         print(f"\nBulk Query: {query}")
         print("-" * 30)
         try:
-            await call_agent_async(runner, ADMIN_USER_ID, bulk_session_id, query)
+            await ask(query)
+            backoff = 0
         except Exception as e:
             print(f"Error: {e}")
-        await asyncio.sleep(1)
+            backoff = await _back_off(backoff)
 
 async def main():
     print("Starting Attendance Management System Tests...")
 
-    # Run the main tests
-    await run_attendance_tests()
-
-    # Run bulk attendance demo
-    await demo_bulk_attendance()
+    # The main tests and the bulk demo use separate users and sessions,
+    # so their model calls can overlap. Queries within each stay
+    # sequential: they share one session's state.
+    await asyncio.gather(run_attendance_tests(), demo_bulk_attendance())
 
     print("\nAll tests completed! Check the database file 'test_attendance_data.db' for persistent data.")
 
@@ -1,10 +1,10 @@
 import asyncio
-from google.adk.sessions import DatabaseSessionService
+from session_store import get_service
 import os
 
 db_url = "sqlite:///./sahayak_agent_data.db"
 print(f"[TEST] Using database at: {os.path.abspath('./sahayak_agent_data.db')}")
-session_service = DatabaseSessionService(db_url=db_url)
+session_service = get_service(db_url)
 
 APP_NAME = "Sahayak Educational Agent"
 USER_ID = "testuser"
@@ -0,0 +1,140 @@
+import asyncio
+import sys
+import os
+from types import SimpleNamespace
+
+# Add the current directory to the path so we can import our modules
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from manager.sub_agents.resource_recommendation_agent import agent as resource_agent
+
+
+# Backend results keyed by query; a query mapped to an exception fails
+STUB_RESULTS = {
+    "fractions": [
+        {"title": "Fraction Strips", "url": "https://example.org/strips"},
+        {"title": "Pizza Fractions", "url": "https://example.org/pizza"},
+    ],
+    "fractions video": [
+        {"title": "Fraction Strips (again)", "url": "https://example.org/strips"},
+        {"title": "Untitled worksheet"},
+        {"title": "Untitled worksheet"},
+        "not a resource",
+    ],
+    "broken": ConnectionError("backend unavailable"),
+}
+
+
+async def stub_search_one(query, grade_level=None, learning_style=None):
+    """Stand-in for the HTTP backend call, using STUB_RESULTS."""
+    await asyncio.sleep(0)
+    result = STUB_RESULTS[query]
+    if isinstance(result, Exception):
+        raise result
+    return result
+
+
+async def topic_search_one(query, grade_level=None, learning_style=None):
+    """Stand-in backend for tool calls: video queries fail, every query shares one URL."""
+    await asyncio.sleep(0)
+    if "video" in query:
+        raise ConnectionError("backend unavailable")
+    return [
+        {"title": f"{query} guide", "url": f"https://example.org/{query.replace(' ', '-')}"},
+        {"title": "Shared overview", "url": "https://example.org/overview"},
+    ]
+
+
+async def failing_search_one(query, grade_level=None, learning_style=None):
+    """Stand-in backend where every query fails."""
+    raise ConnectionError("backend unavailable")
+
+
+def check(condition, message):
+    """Print a test result, raising on failure."""
+    if not condition:
+        raise AssertionError(message)
+    print(f"PASS: {message}")
+
+
+async def test_merge():
+    print("\n--- search_web_resources ---")
+    resource_agent._search_one = stub_search_one
+
+    resources = await resource_agent.search_web_resources(["broken", "fractions"])
+    check([r["title"] for r in resources] == ["Fraction Strips", "Pizza Fractions"],
+          "failed queries are skipped")
+
+    check(await resource_agent.search_web_resources(["broken"]) == [],
+          "all queries failing returns no resources")
+
+    resources = await resource_agent.search_web_resources(["fractions", "broken", "fractions video"])
+    check([r["title"] for r in resources] == ["Fraction Strips", "Pizza Fractions", "Untitled worksheet"],
+          "duplicates are dropped by URL, or by title without one, keeping the first")
+
+    resources[0]["title"] = "Edited"
+    check(STUB_RESULTS["fractions"][0]["title"] == "Fraction Strips",
+          "returned resources are copies of the backend results")
+
+
+async def test_tool():
+    print("\n--- search_educational_resources ---")
+    resource_agent._SEARCH_ENDPOINT = "https://search.invalid/"
+    tool_context = SimpleNamespace(state={"user_name": "Test Teacher"})
+
+    resource_agent._search_one = topic_search_one
+    result = await resource_agent.search_educational_resources(
+        "fractions", tool_context=tool_context
+    )
+    check(result["status"] == "success", "the async tool returns success")
+    urls = [r["url"] for r in result["recommendations"]["resources"]]
+    check(len(urls) == len(set(urls)) and "https://example.org/overview" in urls,
+          "tool results are merged without duplicate URLs")
+    check(not any("video" in url for url in urls), "failed backend queries are left out")
+    history = tool_context.state["resource_search_history"]
+    check(len(history) == 1 and history[0]["results_count"] == len(urls),
+          "the search is recorded in resource_search_history")
+
+    resource_agent._search_one = failing_search_one
+    result = await resource_agent.search_educational_resources(
+        "fractions", tool_context=tool_context
+    )
+    check(result["status"] == "success" and result["recommendations"]["resources"],
+          "sample resources are used when every backend query fails")
+
+
+async def test_session_lifecycle():
+    print("\n--- search session ---")
+    # A session created on a loop that has since finished
+    stale_session = await asyncio.to_thread(asyncio.run, resource_agent._get_search_session())
+    check(not stale_session.closed, "a session is created on the first loop")
+
+    session = await resource_agent._get_search_session()
+    check(session is not stale_session and stale_session.closed,
+          "switching loops replaces and closes the previous session")
+    check(await resource_agent._get_search_session() is session,
+          "the same loop reuses its session")
+
+    await resource_agent.close_search_session()
+    check(session.closed, "close_search_session closes the shared session")
+    check(await resource_agent._get_search_session() is not session,
+          "a closed session is replaced on next use")
+    await resource_agent.close_search_session()
+
+
+async def main():
+    print("Starting resource search tests...")
+    search_one = resource_agent._search_one
+    search_endpoint = resource_agent._SEARCH_ENDPOINT
+    try:
+        await test_merge()
+        await test_tool()
+    finally:
+        resource_agent._search_one = search_one
+        resource_agent._SEARCH_ENDPOINT = search_endpoint
+    await test_session_lifecycle()
+    print("\nAll resource search tests passed.")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())